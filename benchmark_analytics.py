@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARKS - VOID analytics pipeline
+Measures wall time and peak memory of loading, cleaning, profiling, charts and exports
+on synthetic datasets of increasing size. LLM calls are answered by a local stub.
+
+Usage:
+    python benchmark_analytics.py                          # small + medium scenarios
+    python benchmark_analytics.py --scenarios large,wide   # pick scenarios
+    python benchmark_analytics.py --compare old.json       # compare with a previous run
+    python benchmark_analytics.py --startup                # also time app cold start in fresh processes
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Modules VOID (imports directs dans le même dossier)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'void'))
+
+from data_processor import DataProcessor
+from visualization import VisualizationGenerator
+from export_handler import ExportHandler
+
+# Synthetic datasets: rows, width (columns), categorical cardinality, JSON nesting depth
+SCENARIOS = {
+    "small": {"rows": 1_000, "width": 10, "cardinality": 10, "depth": 1},
+    "medium": {"rows": 100_000, "width": 20, "cardinality": 100, "depth": 2},
+    "large": {"rows": 1_000_000, "width": 30, "cardinality": 10_000, "depth": 3},
+    "wide": {"rows": 10_000, "width": 1_000, "cardinality": 50, "depth": 1},
+}
+DEFAULT_SCENARIOS = ["small", "medium"]
+
+# Canned model answer used instead of a real LLM call
+STUB_AI_RESPONSE = json.dumps({
+    "insights": ["stub insight"],
+    "patterns": ["stub pattern"],
+    "recommendations": ["stub recommendation"],
+    "anomalies": [],
+    "chart_recommendations": [],
+    "response": "stub answer"
+})
+
+
+# Run in a fresh interpreter: heavy module import times, then the app's first and second render
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {void_dir!r})
+timings = {{}}
+if {imports!r}:
+    from lazy_imports import measure_import_times
+    timings.update({{f"import[{{name}}]": t for name, t in measure_import_times().items()}})
+else:
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file({app_path!r}, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    timings["app_first_render"] = time.perf_counter() - start
+    start = time.perf_counter()
+    app.run()
+    timings["app_rerun"] = time.perf_counter() - start
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"timings": timings, "peak_memory_mb": peak_mb}}))
+"""
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory stand-in for Streamlit's UploadedFile"""
+
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+
+
+class StubMessages:
+    def create(self, **kwargs):
+        block = type("Block", (), {"text": STUB_AI_RESPONSE})()
+        return type("Response", (), {"content": [block]})()
+
+
+class StubAnthropic:
+    """Local replacement for the Anthropic client: no network, fixed answer"""
+
+    def __init__(self):
+        self.messages = StubMessages()
+
+
+def make_dataset(rows: int, width: int, cardinality: int, seed: int = 42) -> pd.DataFrame:
+    """Build a mixed-type DataFrame: numerics, categoricals, dates, numeric strings, missing values"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "timestamp": pd.date_range("2020-01-01", periods=rows, freq="min"),
+        "category": rng.choice([f"cat_{i}" for i in range(cardinality)], rows),
+    }
+    for i in range(max(width - 2, 1)):
+        kind = i % 4
+        if kind == 0:
+            values = rng.normal(100, 15, rows)
+            values[rng.random(rows) < 0.05] = np.nan
+        elif kind == 1:
+            values = rng.integers(0, 1000, rows)
+        elif kind == 2:
+            values = rng.choice([f"v{j}" for j in range(min(cardinality, 50))], rows)
+        else:
+            # Numeric values stored as strings, converted by clean_data
+            values = rng.integers(0, 100, rows).astype(str)
+        columns[f"col_{i}"] = values
+    return pd.DataFrame(columns)
+
+
+def make_nested_records(df: pd.DataFrame, depth: int, limit: int = 50_000) -> List[Dict[str, Any]]:
+    """Turn the first rows of a DataFrame into JSON records nested depth levels deep"""
+    records = json.loads(df.head(limit).to_json(orient="records", date_format="iso"))
+    for record in records:
+        for level in range(depth - 1):
+            record[f"nested_{level}"] = {"value": level, "inner": {"tag": record.get("category")}}
+    return records
+
+
+class AnalyticsBenchmark:
+    def __init__(self, repeat: int = 1):
+        self.repeat = repeat
+        self.results: List[Dict[str, Any]] = []
+        self.data_processor = DataProcessor()
+        self.viz_generator = VisualizationGenerator()
+        self.export_handler = ExportHandler()
+        self.ai_analyzer = self._make_stub_analyzer()
+
+    def _make_stub_analyzer(self):
+        """AIAnalyzer wired to the local stub client (no SDK import, no network)"""
+        try:
+            from ai_analyzer import AIAnalyzer
+        except ImportError as e:
+            print(f"⚠️  AI benchmarks skipped: {e}")
+            return None
+        analyzer = AIAnalyzer(anthropic_client=StubAnthropic())
+        return analyzer
+
+    def measure(self, scenario: str, stage: str, func: Callable[[], Any], rows: int) -> Any:
+        """Run func repeat times, record best wall time and peak traced memory"""
+        result = None
+        timings = []
+        peak = 0
+        error = None
+        for _ in range(self.repeat):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                error = str(e)
+            timings.append(time.perf_counter() - start)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            if error:
+                break
+
+        entry = {
+            "scenario": scenario,
+            "stage": stage,
+            "rows": rows,
+            "wall_time_s": round(min(timings), 6),
+            "peak_memory_mb": round(peak / 1024 / 1024, 3),
+            "success": error is None,
+            "details": error or ""
+        }
+        self.results.append(entry)
+        status_icon = "✅" if error is None else "❌"
+        print(f"{status_icon} {scenario:<7} {stage:<32} {entry['wall_time_s']:>9.4f}s {entry['peak_memory_mb']:>10.2f} MB {entry['details']}")
+        return result
+
+    def run_scenario(self, name: str, config: Dict[str, int]):
+        rows = config["rows"]
+        raw_df = make_dataset(rows, config["width"], config["cardinality"])
+        csv_bytes = raw_df.to_csv(index=False).encode("utf-8")
+        json_bytes = json.dumps(make_nested_records(raw_df, config["depth"])).encode("utf-8")
+
+        # Loading and cleaning
+        m = self.measure
+        df = m(name, "load_file[csv]", lambda: self.data_processor.load_file(NamedBytesIO(csv_bytes, "bench.csv")), rows)
+        m(name, "load_file[json]", lambda: self.data_processor.load_file(NamedBytesIO(json_bytes, "bench.json")), rows)
+        m(name, "clean_data", lambda: self.data_processor.clean_data(raw_df.copy()), rows)
+        if df is None:
+            return
+
+        # Profiling
+        m(name, "get_data_summary", lambda: self.data_processor.get_data_summary(df), rows)
+        m(name, "detect_anomalies", lambda: self.data_processor.detect_anomalies(df), rows)
+        m(name, "profile_keys", lambda: self.data_processor.profile_keys(df), rows)
+
+        # Charts (fresh generator per chart so cached aggregates do not hide the first build)
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        charts = {
+            "create_scatter_line[scatter]": lambda v: v.create_scatter_line(df, numeric_cols[0], numeric_cols[1], chart_type="scatter plot"),
+            "create_scatter_line[line]": lambda v: v.create_scatter_line(df, numeric_cols[0], numeric_cols[1], chart_type="line chart"),
+            "create_scatter_line[time]": lambda v: v.create_scatter_line(df, "timestamp", numeric_cols[0], chart_type="line chart"),
+            "create_bar_chart": lambda v: v.create_bar_chart(df, "category", numeric_cols[0]),
+            "create_histogram": lambda v: v.create_histogram(df, numeric_cols[0]),
+            "create_box_plot": lambda v: v.create_box_plot(df, ["category", numeric_cols[0]]),
+            "create_correlation_matrix": lambda v: v.create_correlation_matrix(df),
+            "create_heatmap": lambda v: v.create_heatmap(df, []),
+            "create_summary_dashboard": lambda v: v.create_summary_dashboard(df),
+        }
+        figures = []
+        for stage, build in charts.items():
+            fig = m(name, stage, lambda: build(VisualizationGenerator()), rows)
+            if fig is not None and not isinstance(fig, list):
+                figures.append(fig)
+
+        # Exports
+        analysis = json.loads(STUB_AI_RESPONSE)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if figures:
+                m(name, "export_chart_html", lambda: self.export_handler.export_chart_html(figures[0]), rows)
+                m(name, "export_chart_compact", lambda: self.export_handler.export_chart_compact(figures[0]), rows)
+                m(name, "batch_export_charts[html]",
+                  lambda: self.export_handler.batch_export_charts(figures, os.path.join(tmp_dir, "charts")), rows)
+            m(name, "export_analysis_report", lambda: self.export_handler.export_analysis_report(df, analysis), rows)
+            m(name, "create_dashboard_export", lambda: self.export_handler.create_dashboard_export(df, analysis, figures), rows)
+            m(name, "export_data_csv", lambda: self.export_handler.export_data_csv(df), rows)
+            m(name, "export_data_json", lambda: self.export_handler.export_data_json(df), rows)
+            m(name, "write_data_export[csv.gz]",
+              lambda: self.export_handler.write_data_export(df, os.path.join(tmp_dir, "data.csv.gz"), "csv", "gzip"), rows)
+            m(name, "write_data_export[ndjson]",
+              lambda: self.export_handler.write_data_export(df, os.path.join(tmp_dir, "data.ndjson"), "ndjson"), rows)
+
+        # AI pipeline with the stub client (prompt building and parsing only)
+        if self.ai_analyzer is not None:
+            m(name, "analyze_data[stub]", lambda: self.ai_analyzer.analyze_data(df, "Quick Overview"), rows)
+            m(name, "answer_question[stub]", lambda: self.ai_analyzer.answer_question(df, "What is the average?"), rows)
+            m(name, "answer_with_query[stub]", lambda: self.ai_analyzer.answer_with_query(df, "What is the average?"), rows)
+            m(name, "answer_questions[stub]",
+              lambda: self.ai_analyzer.answer_questions(df, ["What is the average?"] * 5, requests_per_minute=6000), rows)
+
+    def run_startup(self):
+        """Time module imports and the app's first render, each in a fresh Python process"""
+        void_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "void")
+        app_path = os.path.join(void_dir, "main_analytics.py")
+        print("\n🚀 Startup (fresh process per run)")
+        for imports in (True, False):
+            best: Dict[str, float] = {}
+            peak = 0.0
+            error = None
+            for _ in range(self.repeat):
+                script = STARTUP_SCRIPT.format(void_dir=void_dir, app_path=app_path, imports=imports)
+                proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=void_dir)
+                if proc.returncode != 0:
+                    error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+                    break
+                output = json.loads(proc.stdout.strip().splitlines()[-1])
+                peak = max(peak, output["peak_memory_mb"])
+                for stage, seconds in output["timings"].items():
+                    if seconds is not None:
+                        best[stage] = min(best.get(stage, seconds), seconds)
+
+            if error:
+                best = {"import" if imports else "app_first_render": 0.0}
+            for stage, seconds in best.items():
+                entry = {
+                    "scenario": "startup",
+                    "stage": stage,
+                    "rows": 0,
+                    "wall_time_s": round(seconds, 6),
+                    "peak_memory_mb": round(peak, 3),
+                    "success": error is None,
+                    "details": error or ""
+                }
+                self.results.append(entry)
+                status_icon = "✅" if error is None else "❌"
+                print(f"{status_icon} {'startup':<7} {stage:<32} {entry['wall_time_s']:>9.4f}s {entry['peak_memory_mb']:>10.2f} MB {entry['details']}")
+
+    def run(self, scenarios: List[str]):
+        print("=" * 80)
+        print("⏱️  VOID ANALYTICS BENCHMARKS")
+        print("=" * 80)
+        for name in scenarios:
+            print(f"\n📦 Scenario {name}: {SCENARIOS[name]}")
+            self.run_scenario(name, SCENARIOS[name])
+
+    def save(self, path: str):
+        report = {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+            },
+            "scenarios": {name: SCENARIOS[name] for name in {r["scenario"] for r in self.results} if name in SCENARIOS},
+            "results": self.results,
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Résultats sauvegardés dans {path}")
+
+    def compare(self, baseline_path: str, threshold: float = 1.2):
+        """Print stages that got slower (or used more memory) than in a previous run"""
+        with open(baseline_path) as f:
+            baseline = {(r["scenario"], r["stage"]): r for r in json.load(f)["results"]}
+
+        print("\n" + "=" * 80)
+        print(f"📈 COMPARAISON avec {baseline_path} (seuil x{threshold})")
+        print("=" * 80)
+        regressions = 0
+        for result in self.results:
+            old = baseline.get((result["scenario"], result["stage"]))
+            if not old or not old["success"] or not result["success"]:
+                continue
+            time_ratio = result["wall_time_s"] / old["wall_time_s"] if old["wall_time_s"] else 1.0
+            mem_ratio = result["peak_memory_mb"] / old["peak_memory_mb"] if old["peak_memory_mb"] else 1.0
+            if time_ratio > threshold or mem_ratio > threshold:
+                regressions += 1
+                print(f"❌ {result['scenario']:<7} {result['stage']:<32} time x{time_ratio:.2f} memory x{mem_ratio:.2f}")
+        print(f"{'✅ Aucune régression' if regressions == 0 else f'❌ {regressions} régression(s)'}")
+        return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the VOID analytics pipeline")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"Comma-separated scenarios among: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (best time is kept)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as regression")
+    parser.add_argument("--startup", action="store_true",
+                        help="Also measure import times and the app's cold start in fresh processes")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    benchmark = AnalyticsBenchmark(repeat=args.repeat)
+    benchmark.run(scenarios)
+    if args.startup:
+        benchmark.run_startup()
+    benchmark.save(args.output)
+    if args.compare:
+        sys.exit(1 if benchmark.compare(args.compare, args.threshold) else 0)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+⚔️ UBIK - Batch Oracle
+Profile a directory of CSV/JSON/Parquet files and write dashboards and reports, without Streamlit.
+
+Usage:
+    python ubik/batch_analytics.py data/exports -o reports
+    python ubik/batch_analytics.py data/exports -o reports --workers 8 --charts png
+    python ubik/batch_analytics.py data/exports -o reports --ai "Quick Overview"
+"""
+import argparse
+import os
+import sys
+
+# Ajouter le chemin vers les modules VOID
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'void'))
+
+CHART_FORMATS = ['html', 'png', 'svg', 'webp', 'none']
+AI_ANALYSIS_TYPES = ['Quick Overview', 'Statistical Analysis', 'Pattern Detection', 'Anomaly Detection']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch analytics over a directory of data files")
+    parser.add_argument("input_dir", help="Directory containing CSV, JSON or Parquet files")
+    parser.add_argument("-o", "--output-dir", default="analytics_reports", help="Where reports are written")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also process files in subdirectories")
+    parser.add_argument("--charts", choices=CHART_FORMATS, default="html",
+                        help="Per-chart export format ('none' keeps charts only inside the report)")
+    parser.add_argument("--no-dashboard", action="store_true", help="Skip chart generation entirely")
+    parser.add_argument("--plotlyjs", choices=["cdn", "embed"], default="cdn",
+                        help="Reference plotly.js from the CDN or embed it once per report")
+    parser.add_argument("--ai", choices=AI_ANALYSIS_TYPES, default=None,
+                        help="Also run an AI analysis (needs ANTHROPIC_API_KEY or OPENAI_API_KEY)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Not a directory: {args.input_dir}")
+        return 2
+
+    # Imported after argument parsing so --help and usage errors stay instant
+    from batch_engine import BatchEngine, find_datasets
+
+    paths = find_datasets(args.input_dir, recursive=args.recursive)
+    if not paths:
+        print(f"⚠️  No CSV, JSON or Parquet files found in {args.input_dir}")
+        return 0
+
+    print(f"⚔️ VOID batch - {len(paths)} file(s) -> {args.output_dir}")
+    engine = BatchEngine(
+        args.output_dir,
+        max_workers=args.workers,
+        charts=not args.no_dashboard,
+        chart_format=None if args.charts == 'none' else args.charts,
+        ai_analysis=args.ai,
+        plotlyjs='cdn' if args.plotlyjs == 'cdn' else True
+    )
+
+    def progress(entry):
+        if entry['success']:
+            total = sum(entry['timings'].values())
+            print(f"✅ {entry['file']} ({entry['rows']:,} rows, {total:.2f}s)")
+            if entry.get('dashboard_error'):
+                print(f"   ⚠️ dashboard skipped: {entry['dashboard_error']}")
+        else:
+            print(f"❌ {entry['file']}: {entry['error']}")
+
+    manifest = engine.run(paths, progress=progress)
+    print(f"📋 {manifest['succeeded']}/{manifest['files']} succeeded in {manifest['wall_time_s']:.2f}s")
+    print(f"💾 Manifest: {os.path.join(args.output_dir, 'manifest.json')}")
+    return 0 if manifest['succeeded'] == manifest['files'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
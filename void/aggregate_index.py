@@ -0,0 +1,260 @@
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+# Statistics kept for every (group key, numeric column) pair
+SUMMARY_COLUMNS = ['count', 'sum', 'mean', 'min', 'max', 'q1', 'median', 'q3', 'lowerfence', 'upperfence']
+
+# Bins of the fine base histogram; divisible by most bin counts a user picks,
+# so those are re-binned by summing adjacent base bins (others are recounted)
+BASE_HISTOGRAM_BINS = 2520
+
+# Time-series rollup resolutions, finest first: (pandas frequency, label, approximate bucket width)
+TIME_RESOLUTIONS = [
+    ('min', 'minute', pd.Timedelta(minutes=1)),
+    ('h', 'hour', pd.Timedelta(hours=1)),
+    ('D', 'day', pd.Timedelta(days=1)),
+    ('W', 'week', pd.Timedelta(weeks=1)),
+    ('MS', 'month', pd.Timedelta(days=30)),
+]
+
+
+class AggregateIndex:
+    """Lazily built group summaries and histograms of one dataset, reused across charts"""
+
+    def __init__(self, df: pd.DataFrame):
+        # Weak reference so the index never keeps a dataset alive on its own
+        self._df_ref = weakref.ref(df)
+        self._summaries: Dict[Tuple[Optional[str], Optional[str]], pd.DataFrame] = {}
+        self._base_histograms: Dict[str, Dict[str, Any]] = {}
+        self._histograms: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # (time column, value column) -> {frequency -> rollup}
+        self._rollups: Dict[Tuple[str, str], Dict[str, pd.DataFrame]] = {}
+        # (key column, value column, bins) -> per-bin statistics; column -> distinct count
+        self._binned: Dict[Tuple[str, Optional[str], int], pd.DataFrame] = {}
+        self._distinct: Dict[str, int] = {}
+
+    def summary(self, key_col: Optional[str], value_col: Optional[str] = None) -> pd.DataFrame:
+        """Return per-group statistics of value_col, grouped by key_col (None = whole column)
+
+        Without value_col only the row count per group is computed.
+        """
+        cache_key = (key_col, value_col)
+        if cache_key not in self._summaries:
+            df = self._df_ref()
+            if df is None:
+                raise ValueError("Dataset for this aggregate index no longer exists")
+            self._summaries[cache_key] = self._build(df, key_col, value_col)
+        return self._summaries[cache_key]
+
+    def histogram(self, value_col: str, bins: int = 30) -> Dict[str, Any]:
+        """Return bin edges, counts and box statistics of a numeric column
+
+        The first call scans the column once into a fine base histogram plus
+        quartiles; bin counts that divide the base bins are summed from it, any
+        other bin count takes one more exact counting pass.
+        """
+        cache_key = (value_col, bins)
+        if cache_key in self._histograms:
+            return self._histograms[cache_key]
+
+        base = self._base_histograms.get(value_col)
+        if base is None:
+            df = self._df_ref()
+            if df is None:
+                raise ValueError("Dataset for this aggregate index no longer exists")
+            base = self._build_base_histogram(df[value_col])
+            self._base_histograms[value_col] = base
+
+        if base['count'] == 0:
+            edges, counts = np.array([0.0, 1.0]), np.array([0])
+        elif BASE_HISTOGRAM_BINS % bins == 0:
+            counts = base['counts'].reshape(bins, -1).sum(axis=1)
+            edges = base['edges'][::BASE_HISTOGRAM_BINS // bins]
+        else:
+            # Requested edges cut through base bins, so count the column again over the same range
+            df = self._df_ref()
+            if df is None:
+                raise ValueError("Dataset for this aggregate index no longer exists")
+            values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+            counts, edges = np.histogram(
+                values[~np.isnan(values)], bins=bins, range=(base['edges'][0], base['edges'][-1])
+            )
+
+        result = {'edges': edges, 'counts': counts, 'box': base['box'], 'count': base['count']}
+        self._histograms[cache_key] = result
+        return result
+
+    def distinct_count(self, col: str) -> int:
+        """Number of distinct non-null values of a column"""
+        if col not in self._distinct:
+            df = self._df_ref()
+            if df is None:
+                raise ValueError("Dataset for this aggregate index no longer exists")
+            self._distinct[col] = int(df[col].nunique())
+        return self._distinct[col]
+
+    def binned_summary(self, key_col: str, value_col: Optional[str] = None, bins: int = 30) -> pd.DataFrame:
+        """Return count (and sum/mean of value_col) per equal-width bin of a numeric key column
+
+        Bins share the edges of the key column's histogram, so a bar chart over a
+        continuous column lines up with its histogram.
+        """
+        cache_key = (key_col, value_col, bins)
+        if cache_key in self._binned:
+            return self._binned[cache_key]
+
+        edges = self.histogram(key_col, bins)['edges']
+        df = self._df_ref()
+        if df is None:
+            raise ValueError("Dataset for this aggregate index no longer exists")
+        keys = df[key_col].to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(keys)
+        if value_col is not None:
+            values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+            valid &= ~np.isnan(values)
+        positions = np.clip(np.searchsorted(edges, keys[valid], side='right') - 1, 0, len(edges) - 2)
+
+        binned = pd.DataFrame({'left': edges[:-1], 'right': edges[1:]})
+        binned['count'] = np.bincount(positions, minlength=len(edges) - 1)
+        if value_col is not None:
+            binned['sum'] = np.bincount(positions, weights=values[valid], minlength=len(edges) - 1)
+            binned['mean'] = binned['sum'] / binned['count'].where(binned['count'] > 0)
+
+        self._binned[cache_key] = binned
+        return binned
+
+    def time_rollup(self, time_col: str, value_col: Optional[str], freq: str) -> pd.DataFrame:
+        """Return count/sum/mean/min/max of value_col per time bucket of the given frequency
+
+        Without value_col only the row count per bucket is computed. Coarser
+        rollups are derived from the finest rollup already cached for the pair
+        instead of rescanning the dataset.
+        """
+        rollups = self._rollups.setdefault((time_col, value_col), {})
+        if freq in rollups:
+            return rollups[freq]
+
+        # Weeks do not nest inside months, so weekly rollups are never used as a source
+        order = [f for f, _, _ in TIME_RESOLUTIONS]
+        finer = [f for f in order[:order.index(freq)] if f in rollups and f != 'W'] if freq in order else []
+        if finer:
+            source = rollups[finer[-1]]
+            resampled = source.resample(freq)
+            if value_col is None:
+                rollup = resampled[['count']].sum()
+            else:
+                rollup = pd.DataFrame({
+                    'count': resampled['count'].sum(),
+                    'sum': resampled['sum'].sum(),
+                    'min': resampled['min'].min(),
+                    'max': resampled['max'].max()
+                })
+        else:
+            df = self._df_ref()
+            if df is None:
+                raise ValueError("Dataset for this aggregate index no longer exists")
+            if value_col is None:
+                times = df[time_col].dropna()
+                rollup = pd.Series(1, index=times).resample(freq).count().to_frame('count')
+            else:
+                data = df[[time_col, value_col]].dropna().set_index(time_col)[value_col]
+                rollup = data.resample(freq).agg(['count', 'sum', 'min', 'max'])
+
+        rollup = rollup[rollup['count'] > 0]
+        if value_col is not None:
+            rollup['mean'] = rollup['sum'] / rollup['count']
+        rollups[freq] = rollup
+        return rollup
+
+    def _build_base_histogram(self, series: pd.Series) -> Dict[str, Any]:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return {'count': 0, 'edges': None, 'counts': None, 'box': None}
+
+        low, high = values.min(), values.max()
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        counts, edges = np.histogram(values, bins=BASE_HISTOGRAM_BINS, range=(low, high))
+
+        q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        box = {
+            'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': inside.min(), 'upperfence': inside.max(),
+            'mean': values.mean()
+        }
+        return {'count': len(values), 'edges': edges, 'counts': counts, 'box': box}
+
+    def _build(self, df: pd.DataFrame, key_col: Optional[str], value_col: Optional[str]) -> pd.DataFrame:
+        if value_col is None:
+            counts = df.groupby(key_col, sort=True).size()
+            return counts.to_frame('count')
+
+        if key_col is None:
+            data = df[[value_col]].dropna().assign(_all=value_col)
+            key_col = '_all'
+        else:
+            data = df[[key_col, value_col]].dropna(subset=[value_col])
+        grouped = data.groupby(key_col, sort=True)[value_col]
+
+        summary = grouped.agg(['count', 'sum', 'mean', 'min', 'max'])
+        quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        summary['q1'] = quartiles[0.25]
+        summary['median'] = quartiles[0.5]
+        summary['q3'] = quartiles[0.75]
+
+        # Whiskers: most extreme values within 1.5 IQR of the quartiles
+        iqr = summary['q3'] - summary['q1']
+        lower = data[key_col].map(summary['q1'] - 1.5 * iqr)
+        upper = data[key_col].map(summary['q3'] + 1.5 * iqr)
+        inside = data[(data[value_col] >= lower) & (data[value_col] <= upper)]
+        inside_grouped = inside.groupby(key_col, sort=True)[value_col]
+        summary['lowerfence'] = inside_grouped.min()
+        summary['upperfence'] = inside_grouped.max()
+
+        summary.index.name = None if key_col == '_all' else key_col
+        return summary[SUMMARY_COLUMNS]
+
+
+def top_n_with_other(summary: pd.DataFrame, n: int, other_label: str = 'Other') -> Tuple[pd.DataFrame, int]:
+    """Keep the n largest groups by count and merge the rest into one bucket
+
+    Returns the summary and the number of groups merged (0 when nothing was).
+    Counts, sums, minima and maxima merge exactly; quartiles and whiskers are not
+    mergeable, so they are left empty for the merged bucket.
+    """
+    if len(summary) <= n:
+        return summary, 0
+    ordered = summary.sort_values('count', ascending=False, kind='stable')
+    top, rest = ordered.iloc[:n], ordered.iloc[n:]
+
+    other = {'count': rest['count'].sum()}
+    if 'sum' in rest.columns:
+        other['sum'] = rest['sum'].sum()
+        other['mean'] = other['sum'] / other['count'] if other['count'] else np.nan
+        other['min'] = rest['min'].min()
+        other['max'] = rest['max'].max()
+    other_row = pd.DataFrame([other], index=[f"{other_label} ({len(rest)} groups)"], columns=summary.columns)
+    return pd.concat([top, other_row]), len(rest)
+
+
+def fitting_time_resolutions(start: pd.Timestamp, end: pd.Timestamp, max_points: int) -> List[Tuple[str, str]]:
+    """Return the (frequency, label) resolutions, finest first, whose bucket count over [start, end] fits the point budget
+
+    The coarsest resolution is always returned, even when the span is too long for it.
+    """
+    span = end - start
+    fitting = [(freq, label) for freq, label, width in TIME_RESOLUTIONS if span / width <= max_points]
+    if not fitting:
+        freq, label, _ = TIME_RESOLUTIONS[-1]
+        fitting = [(freq, label)]
+    return fitting
+
+
+def choose_time_resolution(start: pd.Timestamp, end: pd.Timestamp, max_points: int) -> Tuple[str, str]:
+    """Pick the finest resolution whose bucket count over [start, end] fits the point budget"""
+    return fitting_time_resolutions(start, end, max_points)[0]
@@ -0,0 +1,149 @@
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+# pandas, plotly and the AI SDKs are imported inside the worker functions so that
+# importing this module (and the CLI --help) stays fast.
+
+# File types the batch engine can profile
+BATCH_FILE_TYPES = ('csv', 'json', 'parquet')
+
+
+def find_datasets(input_dir: str, recursive: bool = False) -> List[str]:
+    """List the CSV/JSON/Parquet files in a directory, sorted by path"""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.split('.')[-1].lower() in BATCH_FILE_TYPES:
+                paths.append(os.path.join(dirpath, name))
+        if not recursive:
+            break
+    return paths
+
+
+def _load_dataset(data_processor, path: str):
+    """Load one file with the same parsing and cleaning rules as the Streamlit app"""
+    if path.split('.')[-1].lower() == 'json':
+        with open(path, 'rb') as f:
+            return data_processor.load_file(f)
+    return data_processor.load_local_dataset(os.path.dirname(path), os.path.basename(path))
+
+
+def process_dataset(path: str, output_dir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile one file and write its summary, charts and HTML report into output_dir
+
+    Runs in a worker process; returns a manifest entry with timings and written files.
+    """
+    from data_processor import DataProcessor
+    from visualization import VisualizationGenerator
+    from export_handler import ExportHandler
+
+    # One folder per file, e.g. sales.csv -> sales_csv/
+    stem, extension = os.path.splitext(os.path.basename(path))
+    target_dir = os.path.join(output_dir, f"{stem}_{extension.lstrip('.').lower()}")
+    os.makedirs(target_dir, exist_ok=True)
+    entry = {'file': path, 'output_dir': target_dir, 'success': False, 'timings': {}, 'outputs': []}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        result = func()
+        entry['timings'][stage] = round(time.perf_counter() - start, 4)
+        return result
+
+    try:
+        data_processor = DataProcessor()
+        viz_generator = VisualizationGenerator()
+        export_handler = ExportHandler()
+
+        df = timed('load', lambda: _load_dataset(data_processor, path))
+        entry['rows'], entry['columns'] = df.shape
+
+        summary = timed('summary', lambda: data_processor.get_data_summary(df))
+        anomalies = timed('anomalies', lambda: data_processor.detect_anomalies(df))
+        summary_path = os.path.join(target_dir, 'summary.json')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'anomalies': anomalies}, f, indent=2, default=str)
+        entry['outputs'].append(summary_path)
+
+        figures = []
+        if options.get('charts', True):
+            try:
+                figures = timed('dashboard', lambda: viz_generator.create_summary_dashboard(df))
+            except Exception as e:
+                # Still write the summary and report, without charts; the error goes in the manifest
+                entry['dashboard_error'] = str(e)
+        if figures and options.get('chart_format'):
+            chart_paths = timed('charts', lambda: export_handler.batch_export_charts(
+                figures, os.path.join(target_dir, 'charts'), options['chart_format'], max_workers=1
+            ))
+            entry['outputs'].extend(chart_paths)
+
+        analysis_results = {}
+        if options.get('ai_analysis'):
+            from ai_analyzer import AIAnalyzer
+            analysis_results = timed('ai', lambda: AIAnalyzer().analyze_data(df, options['ai_analysis']))
+
+        report_path = os.path.join(target_dir, 'report.html')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            timed('report', lambda: export_handler.write_analysis_report(
+                f, df, analysis_results, figures, include_plotlyjs=options.get('plotlyjs', 'cdn')
+            ))
+        entry['outputs'].append(report_path)
+        entry['success'] = True
+
+    except Exception as e:
+        entry['error'] = str(e)
+        entry['traceback'] = traceback.format_exc()
+
+    return entry
+
+
+class BatchEngine:
+    """Profile many files in parallel worker processes without a browser or Streamlit session"""
+
+    def __init__(self, output_dir: str, max_workers: Optional[int] = None, charts: bool = True,
+                 chart_format: Optional[str] = 'html', ai_analysis: Optional[str] = None,
+                 plotlyjs: str = 'cdn'):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.options = {
+            'charts': charts,
+            'chart_format': chart_format,
+            'ai_analysis': ai_analysis,
+            'plotlyjs': plotlyjs
+        }
+
+    def run(self, paths: List[str], progress=None) -> Dict[str, Any]:
+        """Process every file, write manifest.json into the output directory and return it
+
+        progress, if given, is called with each manifest entry as soon as its file is done.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        entries = []
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(process_dataset, path, self.output_dir, self.options) for path in paths]
+            for future in as_completed(futures):
+                entry = future.result()
+                entries.append(entry)
+                if progress is not None:
+                    progress(entry)
+
+        entries.sort(key=lambda e: e['file'])
+        manifest = {
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'output_dir': self.output_dir,
+            'options': self.options,
+            'files': len(entries),
+            'succeeded': sum(1 for e in entries if e['success']),
+            'wall_time_s': round(time.perf_counter() - start, 3),
+            'results': entries
+        }
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        return manifest
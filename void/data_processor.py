@@ -1,12 +1,73 @@
 import pandas as pd
+import io
 import json
+import os
+import threading
 import numpy as np
-from typing import Union, Dict, Any
-import streamlit as st
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Union, Dict, Any, List, Optional
+from instrumentation import traced, tracer
+from incremental_profile import (IncrementalProfiler, build_hash_profile, extend_hash_profile, merge_profiles,
+                                 profile_frame, summarize_keys, summarize_profile)
+from memory_admission import (
+    ADMISSION_SAMPLE_ROWS, CHUNK_ROWS, ESTIMATE_SAMPLE_BYTES, JSON_EXPANSION_FACTOR,
+    choose_load_mode, compact_frame, estimate_footprint, frame_bytes,
+    memory_budget_bytes, memory_in_use_bytes, reservoir_sample
+)
 
 class DataProcessor:
     """Handles data loading, cleaning, and preprocessing"""
     
+    # Number of datasets whose per-column stats are kept in memory
+    MAX_CACHED_DATASETS = 8
+    
+    # File types that can be opened from a local data directory
+    LOCAL_FILE_TYPES = ('csv', 'parquet')
+    
+    # Progressive mode: rows in the quick sample, how long to wait for the exact
+    # result before showing the sample-based one, and how many datasets (and
+    # tasks per dataset) keep their exact results
+    PROGRESSIVE_SAMPLE_ROWS = 50_000
+    PROGRESSIVE_LATENCY_TARGET = 0.5
+    MAX_PROGRESSIVE_DATASETS = 2
+    MAX_PROGRESSIVE_TASKS = 16
+    
+    def __init__(self):
+        # dataset key -> {column name -> column details}
+        self._column_details_cache: OrderedDict = OrderedDict()
+        # dataset key -> hash profile (row and key-column hashes) for duplicate and key detection
+        self._hash_profile_cache: OrderedDict = OrderedDict()
+        self.incremental_profiler = IncrementalProfiler()
+        # (path, columns, mtime, size) -> cleaned DataFrame
+        self._local_cache: OrderedDict = OrderedDict()
+        # (dataset key, rows, stratify column) -> sample; dataset key -> {task key -> future of the exact result}
+        self._sample_cache: OrderedDict = OrderedDict()
+        self._progressive_tasks: OrderedDict = OrderedDict()
+        self._progressive_executor: Optional[ThreadPoolExecutor] = None
+        # source key -> load plan; (source key, mode) -> DataFrame loaded compacted or sampled
+        self._load_plans: OrderedDict = OrderedDict()
+        self._planned_cache: OrderedDict = OrderedDict()
+        # Sessions and progressive workers share this instance; guards every cache above
+        self._cache_lock = threading.Lock()
+    
+    def _cache_get(self, cache: OrderedDict, key: Any) -> Any:
+        """Return a cached value and mark it most recently used; None when not cached"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache: OrderedDict, key: Any, value: Any, limit: Optional[int] = None):
+        """Store a value and drop the least recently used entries beyond limit"""
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > (limit or self.MAX_CACHED_DATASETS):
+                cache.popitem(last=False)
+    
+    @traced("data.load_file")
     def load_file(self, uploaded_file) -> pd.DataFrame:
         """Load CSV or JSON file and return pandas DataFrame"""
         try:
@@ -47,6 +108,407 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Failed to load file: {str(e)}")
     
+    @traced("data.load_file_incremental")
+    def load_file_incremental(self, uploaded_file) -> pd.DataFrame:
+        """Load a file, re-parsing only appended rows when a CSV grew since its last upload"""
+        file_extension = uploaded_file.name.split('.')[-1].lower()
+        if file_extension != 'csv':
+            return self.load_file(uploaded_file)
+        
+        try:
+            content = uploaded_file.getvalue() if hasattr(uploaded_file, 'getvalue') else uploaded_file.read()
+            cache_key = uploaded_file.name
+            status, version = self.incremental_profiler.match(cache_key, content)
+            
+            if status == 'same':
+                return version['df']
+            
+            if status == 'append':
+                raw_tail = self.incremental_profiler.parse_tail(version, content)
+                tail = self._align_appended_rows(raw_tail, version)
+                if tail is not None:
+                    df = pd.concat([version['df'], tail])
+                    # Never profiled: stay lazy and profile the whole frame when asked
+                    profile = None if version['profile'] is None else merge_profiles(version['profile'], profile_frame(tail))
+                    new_version = self.incremental_profiler.store(
+                        cache_key, content, df, version['raw_columns'], version['encoding'],
+                        version['raw_rows'] + len(raw_tail), profile
+                    )
+                    new_version['appended_rows'] = len(tail)
+                    if version.get('hash_profile') is not None:
+                        # Hash the new rows with the dtypes they have in the combined frame
+                        new_version['hash_profile'] = extend_hash_profile(
+                            version['hash_profile'], df.iloc[len(version['df']):]
+                        )
+                    return df
+            
+            # Full load of a new or rewritten file
+            try:
+                raw_df = pd.read_csv(io.BytesIO(content), encoding='utf-8')
+                encoding = 'utf-8'
+            except UnicodeDecodeError:
+                raw_df = pd.read_csv(io.BytesIO(content), encoding='latin-1')
+                encoding = 'latin-1'
+            raw_columns = list(raw_df.columns)
+            raw_rows = len(raw_df)
+            df = self.clean_data(raw_df)
+            self.incremental_profiler.store(cache_key, content, df, raw_columns, encoding, raw_rows)
+            return df
+            
+        except Exception as e:
+            raise Exception(f"Failed to load file: {str(e)}")
+    
+    def _align_appended_rows(self, tail: pd.DataFrame, version: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Clean appended rows with the column types of the cached version, or None if they don't fit"""
+        reference = version['df']
+        tail.index = tail.index + version['raw_rows']
+        tail = tail.dropna(how='all')
+        
+        # A column dropped as empty in the old version now has data: types may differ, reload fully
+        dropped = [col for col in tail.columns if col not in reference.columns]
+        if dropped and tail[dropped].notna().any().any():
+            return None
+        tail = tail[reference.columns]
+        
+        for col in reference.columns:
+            parsed = tail[col]
+            if pd.api.types.is_datetime64_any_dtype(reference[col]):
+                converted = pd.to_datetime(parsed, errors='coerce')
+            elif pd.api.types.is_numeric_dtype(reference[col]):
+                converted = pd.to_numeric(parsed, errors='coerce')
+            elif pd.api.types.is_numeric_dtype(parsed) or pd.api.types.is_datetime64_any_dtype(parsed):
+                # A text column whose new rows parse as numbers or dates: a fresh load keeps them as text
+                return None
+            else:
+                continue
+            # Values the cached column type can't hold: a fresh load may type the column differently
+            if (converted.isna() & parsed.notna()).any():
+                return None
+            tail[col] = converted
+        
+        return tail
+    
+    def get_incremental_summary(self, file_name: str, appended_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Return merged per-column statistics for the last loaded version of a CSV file
+        
+        With appended_only, return None unless rows were appended to the version,
+        so a fresh load is never profiled just to be displayed.
+        """
+        version = self.incremental_profiler.get(file_name)
+        if version is None or (appended_only and not version['appended_rows']):
+            return None
+        profile = self.incremental_profiler.get_profile(version)
+        return {
+            'rows': profile['rows'],
+            'appended_rows': version['appended_rows'],
+            'columns': summarize_profile(profile)
+        }
+    
+    def list_local_datasets(self, root: str) -> List[str]:
+        """List files and partitioned directories under root, as paths relative to root"""
+        datasets = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            rel_dir = os.path.relpath(dirpath, root)
+            data_files = [f for f in sorted(filenames) if self._local_file_type(f)]
+            # Partition directories (key=value) are part of their parent dataset
+            if rel_dir != '.' and '=' in os.path.basename(dirpath):
+                continue
+            if rel_dir != '.' and (data_files or any('=' in d for d in dirnames)):
+                datasets.append(rel_dir)
+            if rel_dir == '.':
+                datasets.extend(data_files)
+        return datasets
+    
+    def get_local_columns(self, root: str, dataset: str) -> List[str]:
+        """Read only the schema of a local dataset"""
+        path = self._resolve_local_path(root, dataset)
+        files = self._local_data_files(path)
+        if not files:
+            raise ValueError(f"No CSV or Parquet files found in {dataset}")
+        partition_columns = [key for key, _ in self._partition_values(path, files[0])]
+        if self._local_file_type(files[0]) == 'parquet':
+            columns = self._import_parquet().read_schema(files[0]).names
+        else:
+            columns = list(pd.read_csv(files[0], nrows=0).columns)
+        return columns + [c for c in partition_columns if c not in columns]
+    
+    @traced("data.load_local_dataset")
+    def load_local_dataset(self, root: str, dataset: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a local file or partitioned directory via memory-mapped reads, optionally only some columns"""
+        try:
+            path = self._resolve_local_path(root, dataset)
+            files = self._local_data_files(path)
+            if not files:
+                raise ValueError(f"No CSV or Parquet files found in {dataset}")
+            
+            cache_key = (path, tuple(columns) if columns else None) + self._files_version(files)
+            cached = self._cache_get(self._local_cache, cache_key)
+            if cached is not None:
+                return cached
+            
+            if all(self._local_file_type(f) == 'parquet' for f in files):
+                pq = self._import_parquet()
+                # read_table handles both single files and hive-partitioned directories
+                table = pq.read_table(path, columns=columns, memory_map=True)
+                df = table.to_pandas()
+            else:
+                frames = []
+                for file_path in files:
+                    if self._local_file_type(file_path) == 'parquet':
+                        pq = self._import_parquet()
+                        part = pq.read_table(file_path, memory_map=True).to_pandas()
+                    else:
+                        part = self._read_local_csv(file_path)
+                    for key, value in self._partition_values(path, file_path):
+                        part[key] = value
+                    if columns:
+                        part = part[[c for c in columns if c in part.columns]]
+                    frames.append(part)
+                df = pd.concat(frames, ignore_index=True)
+            
+            df = self.clean_data(df)
+            self._cache_put(self._local_cache, cache_key, df)
+            return df
+            
+        except Exception as e:
+            raise Exception(f"Failed to load local dataset: {str(e)}")
+    
+    def _read_local_csv(self, file_path: str) -> pd.DataFrame:
+        """Read a local CSV memory-mapped, in the encoding its prefix decodes with (latin-1 fallback)"""
+        _, _, encoding = self._read_csv_prefix(file_path)
+        try:
+            return pd.read_csv(file_path, encoding=encoding, memory_map=True, low_memory=False)
+        except UnicodeDecodeError:
+            # Non-UTF-8 bytes past the sampled prefix
+            return pd.read_csv(file_path, encoding='latin-1', memory_map=True, low_memory=False)
+    
+    def _resolve_local_path(self, root: str, dataset: str) -> str:
+        """Resolve a dataset path and make sure it stays inside the data directory"""
+        root = os.path.realpath(root)
+        path = os.path.realpath(os.path.join(root, dataset))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"{dataset} is outside the data directory")
+        if not os.path.exists(path):
+            raise ValueError(f"{dataset} does not exist")
+        return path
+    
+    def _local_file_type(self, file_name: str) -> Optional[str]:
+        extension = file_name.split('.')[-1].lower()
+        return extension if extension in self.LOCAL_FILE_TYPES else None
+    
+    def _local_data_files(self, path: str) -> List[str]:
+        """Return the data files of a dataset (a single file or every file of a directory tree)"""
+        if os.path.isfile(path):
+            return [path] if self._local_file_type(path) else []
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            files.extend(os.path.join(dirpath, f) for f in sorted(filenames) if self._local_file_type(f))
+        return files
+    
+    def _files_version(self, files: List[str]) -> tuple:
+        """(newest mtime, total size, file count) of data files; a directory's own stat
+        does not change when a partition file is rewritten in place"""
+        stats = [os.stat(f) for f in files]
+        return (max((st.st_mtime_ns for st in stats), default=0), sum(st.st_size for st in stats), len(stats))
+    
+    def local_dataset_version(self, root: str, dataset: str) -> tuple:
+        """Version stamp of a local dataset that changes whenever one of its data files does"""
+        return self._files_version(self._local_data_files(self._resolve_local_path(root, dataset)))
+    
+    def _partition_values(self, root: str, file_path: str) -> List[tuple]:
+        """Extract hive-style key=value partitions from the directories between root and a file"""
+        if os.path.isfile(root):
+            return []
+        parts = os.path.relpath(os.path.dirname(file_path), root).split(os.sep)
+        return [tuple(part.split('=', 1)) for part in parts if '=' in part]
+    
+    def _import_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        return pq
+    
+    def _source_key(self, uploaded_file=None, root: Optional[str] = None, dataset: Optional[str] = None,
+                    columns: Optional[List[str]] = None) -> tuple:
+        """Identify an upload (name, size) or a local dataset (path, columns, files version)"""
+        if uploaded_file is not None:
+            return ('upload', uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+        path = self._resolve_local_path(root, dataset)
+        return ('local', path, tuple(columns) if columns else None) + self._files_version(self._local_data_files(path))
+    
+    def _read_csv_prefix(self, source, columns: Optional[List[str]] = None) -> tuple:
+        """Parse the first ESTIMATE_SAMPLE_BYTES of a CSV (bytes or path); return (frame, bytes parsed, encoding)"""
+        if isinstance(source, bytes):
+            prefix = source[:ESTIMATE_SAMPLE_BYTES]
+        else:
+            with open(source, 'rb') as f:
+                prefix = f.read(ESTIMATE_SAMPLE_BYTES)
+        if len(prefix) == ESTIMATE_SAMPLE_BYTES and b'\n' in prefix:
+            # Drop the last, probably truncated, line
+            prefix = prefix[:prefix.rfind(b'\n') + 1]
+        for encoding in ('utf-8', 'latin-1'):
+            try:
+                return pd.read_csv(io.BytesIO(prefix), encoding=encoding, usecols=columns), len(prefix), encoding
+            except UnicodeDecodeError:
+                continue
+    
+    @traced("data.plan_load")
+    def plan_load(self, uploaded_file=None, root: Optional[str] = None, dataset: Optional[str] = None,
+                  columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Estimate the in-memory size of an upload or local dataset before loading it and pick a load mode
+        
+        The estimate extrapolates from a parsed sample (CSV prefix, first Parquet
+        batch) and is compared with the memory budget minus what the process
+        already holds. Modes: 'full', 'compact' (downcast numbers, categorical
+        strings), 'sample' (streamed uniform sample) or 'refuse'. Plans are
+        cached per source; load_planned adds the actual footprint.
+        """
+        try:
+            source_key = self._source_key(uploaded_file, root, dataset, columns)
+            cached = self._cache_get(self._load_plans, source_key)
+            if cached is not None:
+                return cached
+            
+            streamable = True
+            if uploaded_file is not None:
+                file_type = uploaded_file.name.split('.')[-1].lower()
+                if file_type == 'csv':
+                    content = uploaded_file.getvalue() if hasattr(uploaded_file, 'getvalue') else uploaded_file.read()
+                    sample, parsed_bytes, _ = self._read_csv_prefix(content)
+                    estimate = estimate_footprint(sample, len(sample) * len(content) / max(parsed_bytes, 1))
+                else:
+                    # JSON is parsed as a whole: no prefix sample, no streaming
+                    streamable = False
+                    size = int(uploaded_file.size * JSON_EXPANSION_FACTOR)
+                    estimate = {'rows': None, 'full_bytes': size, 'compact_bytes': size, 'compact_load_bytes': size, 'sample_bytes': size}
+            else:
+                files = self._local_data_files(source_key[1])
+                if not files:
+                    raise ValueError(f"No CSV or Parquet files found in {dataset}")
+                estimate = {'rows': 0, 'full_bytes': 0, 'compact_bytes': 0, 'compact_load_bytes': 0, 'sample_bytes': 0}
+                parts = []
+                csv_files = [f for f in files if self._local_file_type(f) == 'csv']
+                if csv_files:
+                    sample, parsed_bytes, _ = self._read_csv_prefix(csv_files[0], columns)
+                    total_size = sum(os.path.getsize(f) for f in csv_files)
+                    parts.append(estimate_footprint(sample, len(sample) * total_size / max(parsed_bytes, 1)))
+                parquet_files = [f for f in files if self._local_file_type(f) == 'parquet']
+                if parquet_files:
+                    pq = self._import_parquet()
+                    first = pq.ParquetFile(parquet_files[0])
+                    available = set(first.schema_arrow.names)
+                    batch = next(first.iter_batches(
+                        batch_size=10_000, columns=[c for c in columns if c in available] if columns else None
+                    ), None)
+                    sample = batch.to_pandas() if batch is not None else pd.DataFrame()
+                    total_rows = sum(pq.ParquetFile(f).metadata.num_rows for f in parquet_files)
+                    parts.append(estimate_footprint(sample, total_rows))
+                for part in parts:
+                    for key in estimate:
+                        estimate[key] += part.get(key, 0)
+                estimate['sample_bytes'] = min(estimate['sample_bytes'], estimate['full_bytes'])
+            
+            plan = choose_load_mode(estimate, memory_budget_bytes(), memory_in_use_bytes(), streamable)
+            plan.update(
+                estimated_rows=estimate['rows'],
+                estimated_bytes=estimate['full_bytes'],
+                estimated_compact_bytes=estimate['compact_bytes'],
+                actual_bytes=None,
+                source_key=source_key
+            )
+            self._cache_put(self._load_plans, source_key, plan, limit=self.MAX_CACHED_DATASETS * 4)
+            return plan
+            
+        except Exception as e:
+            raise Exception(f"Failed to estimate dataset size: {str(e)}")
+    
+    @traced("data.load_planned")
+    def load_planned(self, plan: Dict[str, Any], uploaded_file=None, root: Optional[str] = None,
+                     dataset: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a dataset the way plan_load decided and record its actual in-memory size in the plan"""
+        mode = plan['mode']
+        if mode == 'refuse':
+            raise Exception(f"Dataset not loaded: {plan['reason']}")
+        
+        if mode == 'full':
+            if uploaded_file is not None:
+                df = self.load_file_incremental(uploaded_file)
+            else:
+                df = self.load_local_dataset(root, dataset, columns)
+        else:
+            cache_key = (plan['source_key'], mode)
+            df = self._cache_get(self._planned_cache, cache_key)
+            if df is None:
+                try:
+                    chunks = self._iter_chunks(uploaded_file, root, dataset, columns)
+                    if mode == 'sample':
+                        df = self.clean_data(reservoir_sample(chunks, ADMISSION_SAMPLE_ROWS))
+                    else:
+                        df = self._load_compact(chunks)
+                except Exception as e:
+                    raise Exception(f"Failed to load file ({mode} mode): {str(e)}")
+                self._cache_put(self._planned_cache, cache_key, df)
+        
+        if plan['actual_bytes'] is None:
+            plan['actual_bytes'] = frame_bytes(df)
+            plan['actual_rows'] = len(df)
+        tracer.annotate(mode=mode, estimated_bytes=plan['estimated_bytes'], actual_bytes=plan['actual_bytes'])
+        return df
+    
+    def _iter_chunks(self, uploaded_file=None, root: Optional[str] = None, dataset: Optional[str] = None,
+                     columns: Optional[List[str]] = None):
+        """Yield raw DataFrame chunks of an uploaded CSV or a local dataset, CHUNK_ROWS rows at a time"""
+        if uploaded_file is not None:
+            content = uploaded_file.getvalue() if hasattr(uploaded_file, 'getvalue') else uploaded_file.read()
+            _, _, encoding = self._read_csv_prefix(content)
+            yield from pd.read_csv(io.BytesIO(content), encoding=encoding, chunksize=CHUNK_ROWS)
+            return
+        
+        path = self._resolve_local_path(root, dataset)
+        for file_path in self._local_data_files(path):
+            if self._local_file_type(file_path) == 'parquet':
+                pq = self._import_parquet()
+                parquet_file = pq.ParquetFile(file_path)
+                available = set(parquet_file.schema_arrow.names)
+                selected = [c for c in columns if c in available] if columns else None
+                parts = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS, columns=selected))
+            else:
+                _, _, encoding = self._read_csv_prefix(file_path)
+                parts = pd.read_csv(file_path, encoding=encoding, chunksize=CHUNK_ROWS, low_memory=False)
+            for part in parts:
+                for key, value in self._partition_values(path, file_path):
+                    part[key] = value
+                if columns:
+                    part = part[[c for c in columns if c in part.columns]]
+                yield part
+    
+    def _load_compact(self, chunks) -> pd.DataFrame:
+        """Concatenate chunks converted to compact types, using the column types clean_data picks on the first chunk"""
+        reference = None
+        parts = []
+        for chunk in chunks:
+            if reference is None:
+                reference = self.clean_data(chunk.copy()).dtypes
+            for col, dtype in reference.items():
+                if col not in chunk.columns or chunk[col].dtype == dtype:
+                    continue
+                if pd.api.types.is_numeric_dtype(dtype):
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+                elif pd.api.types.is_datetime64_any_dtype(dtype):
+                    chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+            # Numbers shrink per chunk; string categories are built once on the whole column below
+            parts.append(compact_frame(chunk.dropna(how='all'), category_max_ratio=None))
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat(parts, ignore_index=True).dropna(axis=1, how='all')
+        # Release the chunks before categorizing, so no more than two copies are alive at once
+        del parts
+        return compact_frame(df)
+    
+    @traced("data.clean_data")
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Perform basic data cleaning"""
         # Remove completely empty rows and columns
@@ -76,8 +538,14 @@ class DataProcessor:
         
         return df
     
-    def get_data_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate comprehensive data summary"""
+    @traced("data.get_data_summary")
+    def get_data_summary(self, df: pd.DataFrame, cache_key: Optional[str] = None,
+                         include_keys: bool = False) -> Dict[str, Any]:
+        """Generate comprehensive data summary
+        
+        include_keys adds duplicate-row and candidate-key profiling, a hash of
+        every column (cached per cache_key).
+        """
         summary = {
             'shape': df.shape,
             'columns': list(df.columns),
@@ -105,8 +573,37 @@ class DataProcessor:
                     'top_values': df[col].value_counts().head(5).to_dict() if unique_count <= 100 else {}
                 }
         
+        # Duplicate rows and candidate keys from one hashing pass
+        if include_keys:
+            summary['keys'] = self.profile_keys(df, cache_key=cache_key)
+        
         return summary
     
+    @traced("data.profile_keys")
+    def profile_keys(self, df: pd.DataFrame, cache_key: Optional[str] = None,
+                     file_name: Optional[str] = None) -> Dict[str, Any]:
+        """Count duplicate rows and find candidate keys and near-unique columns
+        
+        Hashes are kept per dataset key; for a CSV loaded with load_file_incremental
+        (file_name), they live with the cached version so appended rows are the only
+        ones hashed again.
+        """
+        version = self.incremental_profiler.get(file_name) if file_name else None
+        if version is not None and version['df'] is df:
+            if version.get('hash_profile') is None:
+                version['hash_profile'] = build_hash_profile(df)
+            return summarize_keys(version['hash_profile'])
+        
+        hash_profile = self._cache_get(self._hash_profile_cache, cache_key) if cache_key is not None else None
+        if hash_profile is not None:
+            return summarize_keys(hash_profile)
+        
+        hash_profile = build_hash_profile(df)
+        if cache_key is not None:
+            self._cache_put(self._hash_profile_cache, cache_key, hash_profile)
+        return summarize_keys(hash_profile)
+    
+    @traced("data.detect_anomalies")
     def detect_anomalies(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Detect anomalies in numeric columns using IQR method"""
         anomalies = {}
@@ -132,6 +629,7 @@ class DataProcessor:
         
         return anomalies
     
+    @traced("data.get_correlation_matrix")
     def get_correlation_matrix(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate correlation matrix for numeric columns"""
         numeric_cols = df.select_dtypes(include=[np.number]).columns
@@ -140,6 +638,7 @@ class DataProcessor:
         else:
             return pd.DataFrame()
     
+    @traced("data.prepare_data_for_ai")
     def prepare_data_for_ai(self, df: pd.DataFrame, max_rows: int = 100) -> str:
         """Prepare data summary for AI analysis"""
         # Get basic summary
@@ -164,3 +663,119 @@ class DataProcessor:
         """
         
         return ai_summary
+    
+    def get_preview_page(self, df: pd.DataFrame, row_page: int = 0, row_page_size: int = 10,
+                         col_page: int = 0, col_page_size: int = 50) -> pd.DataFrame:
+        """Return one page of rows and columns without copying the rest of the frame"""
+        row_start = max(row_page, 0) * row_page_size
+        col_start = max(col_page, 0) * col_page_size
+        return df.iloc[row_start:row_start + row_page_size, col_start:col_start + col_page_size]
+    
+    @traced("data.get_column_details")
+    def get_column_details(self, df: pd.DataFrame, columns: List[str],
+                           cache_key: Optional[str] = None) -> pd.DataFrame:
+        """Compute type, non-null and unique counts for the requested columns only"""
+        cached = {}
+        if cache_key is not None:
+            cached = self._cache_get(self._column_details_cache, cache_key)
+            if cached is None:
+                cached = {}
+                self._cache_put(self._column_details_cache, cache_key, cached)
+        
+        col_info = []
+        for col in columns:
+            if col not in cached:
+                cached[col] = {
+                    'Column': col,
+                    'Type': str(df[col].dtype),
+                    'Non-Null Count': int(df[col].count()),
+                    'Unique Values': int(df[col].nunique())
+                }
+            col_info.append(cached[col])
+        
+        return pd.DataFrame(col_info, columns=['Column', 'Type', 'Non-Null Count', 'Unique Values'])
+    
+    @traced("data.get_sample")
+    def get_sample(self, df: pd.DataFrame, n: Optional[int] = None, stratify_col: Optional[str] = None,
+                   cache_key: Optional[str] = None, seed: int = 0) -> pd.DataFrame:
+        """Return a uniform random sample of about n rows (the whole frame if it is smaller)
+        
+        With stratify_col, every group is sampled at the same rate, so group
+        proportions match the full data (groups of the sample are never empty
+        when the group has rows). Row order of the original frame is kept.
+        """
+        n = n or self.PROGRESSIVE_SAMPLE_ROWS
+        if len(df) <= n:
+            return df
+        key = (cache_key, n, stratify_col)
+        cached = self._cache_get(self._sample_cache, key) if cache_key is not None else None
+        if cached is not None:
+            return cached
+        
+        rng = np.random.default_rng(seed)
+        if stratify_col is None:
+            positions = np.sort(rng.choice(len(df), size=n, replace=False))
+        else:
+            codes, _ = pd.factorize(df[stratify_col], use_na_sentinel=False)
+            fraction = n / len(df)
+            # Random priorities, then the lowest ceil(fraction * size) per group
+            order = np.argsort(codes + rng.random(len(df)))
+            sizes = np.bincount(codes)
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+            quotas = np.ceil(sizes * fraction).astype(np.int64)
+            rank = np.arange(len(df)) - np.repeat(starts, sizes)
+            positions = np.sort(order[rank < np.repeat(quotas, sizes)])
+        sample = df.iloc[positions]
+        
+        if cache_key is not None:
+            self._cache_put(self._sample_cache, key, sample)
+        return sample
+    
+    def run_progressive(self, task_key: Any, func: Callable[[pd.DataFrame], Any], df: pd.DataFrame,
+                        sample: pd.DataFrame, latency_target: Optional[float] = None,
+                        dataset_key: Any = None) -> Dict[str, Any]:
+        """Compute func(df) in the background; return it if ready within the latency target, else func(sample)
+        
+        Returns {'result', 'approximate', 'sample_rows', 'total_rows'}. The exact
+        computation keeps running; later calls with the same task_key return it
+        once it is done (see is_refined). Exact results are kept per dataset_key
+        for the most recently used datasets only.
+        """
+        if sample is df:
+            return {'result': func(df), 'approximate': False, 'sample_rows': len(df), 'total_rows': len(df)}
+        
+        with self._cache_lock:
+            tasks = self._progressive_tasks.get(dataset_key)
+            if tasks is None:
+                tasks = self._progressive_tasks[dataset_key] = OrderedDict()
+                while len(self._progressive_tasks) > self.MAX_PROGRESSIVE_DATASETS:
+                    _, evicted = self._progressive_tasks.popitem(last=False)
+                    for pending in evicted.values():
+                        pending.cancel()
+            self._progressive_tasks.move_to_end(dataset_key)
+            
+            future = tasks.get(task_key)
+            if future is None:
+                if self._progressive_executor is None:
+                    self._progressive_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='void-progressive')
+                future = self._progressive_executor.submit(func, df)
+                tasks[task_key] = future
+                while len(tasks) > self.MAX_PROGRESSIVE_TASKS:
+                    tasks.popitem(last=False)[1].cancel()
+            tasks.move_to_end(task_key)
+        
+        try:
+            result = future.result(timeout=self.PROGRESSIVE_LATENCY_TARGET if latency_target is None else latency_target)
+            return {'result': result, 'approximate': False, 'sample_rows': len(df), 'total_rows': len(df)}
+        except (FutureTimeoutError, CancelledError):
+            # Cancelled: another session evicted the task; the next call resubmits it
+            return {'result': func(sample), 'approximate': True, 'sample_rows': len(sample), 'total_rows': len(df)}
+    
+    def is_refined(self, task_key: Any) -> bool:
+        """True once the exact result of a progressive task is available"""
+        with self._cache_lock:
+            futures = [tasks.get(task_key) for tasks in self._progressive_tasks.values()]
+        for future in futures:
+            if future is not None:
+                return future.done() and not future.cancelled()
+        return False
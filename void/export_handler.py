@@ -1,18 +1,245 @@
 import plotly
+import html
+import io
 import json
 import base64
 import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
-import streamlit as st
+from typing import Dict, Any, Optional, BinaryIO, Iterable, Iterator, List, TextIO, Union
 import os
+from instrumentation import traced
+
+CHART_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Data Analysis Chart - {title_time}</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #f8f9fa;
+        }}
+        .header {{
+            text-align: center;
+            margin-bottom: 30px;
+            color: #333;
+        }}
+        .chart-container {{
+            background: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            padding: 20px;
+            margin: 0 auto;
+            max-width: 1200px;
+        }}
+        .footer {{
+            text-align: center;
+            margin-top: 30px;
+            color: #666;
+            font-size: 0.9em;
+        }}
+    </style>
+    {plotlyjs}
+</head>
+<body>
+    <div class="header">
+        <h1>📊 AI Data Analysis Tool</h1>
+        <p>Generated on {generated}</p>
+    </div>
+    <div class="chart-container">
+        {chart_html}
+    </div>
+    <div class="footer">
+        <p>Created with AI-powered data analysis • Powered by Plotly</p>
+    </div>
+</body>
+</html>
+"""
+
+REPORT_HEADER_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Data Analysis Report - {timestamp}</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+            background-color: #f8f9fa;
+            color: #333;
+        }}
+        .container {{
+            max-width: 1000px;
+            margin: 0 auto;
+            background: white;
+            padding: 40px;
+            border-radius: 10px;
+            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+        }}
+        .header {{
+            text-align: center;
+            border-bottom: 2px solid #e9ecef;
+            padding-bottom: 30px;
+            margin-bottom: 40px;
+        }}
+        .header h1 {{
+            color: #2c3e50;
+            margin-bottom: 10px;
+        }}
+        .section {{
+            margin-bottom: 40px;
+        }}
+        .section h2 {{
+            color: #34495e;
+            border-left: 4px solid #3498db;
+            padding-left: 15px;
+            margin-bottom: 20px;
+        }}
+        .insight-list {{
+            background: #f8f9fa;
+            padding: 20px;
+            border-radius: 8px;
+            border-left: 4px solid #28a745;
+        }}
+        .insight-list li {{
+            margin-bottom: 10px;
+        }}
+        .data-summary {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 20px;
+            margin-bottom: 30px;
+        }}
+        .stat-card {{
+            background: #e9ecef;
+            padding: 20px;
+            border-radius: 8px;
+            text-align: center;
+        }}
+        .stat-value {{
+            font-size: 2em;
+            font-weight: bold;
+            color: #3498db;
+        }}
+        .stat-label {{
+            color: #666;
+            margin-top: 5px;
+        }}
+        .footer {{
+            text-align: center;
+            margin-top: 50px;
+            padding-top: 30px;
+            border-top: 2px solid #e9ecef;
+            color: #666;
+        }}
+    </style>
+    {plotlyjs}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🤖 AI Data Analysis Report</h1>
+            <p>Generated on {timestamp}</p>
+        </div>
+
+        <div class="section">
+            <h2>📊 Dataset Overview</h2>
+            <div class="data-summary">
+                <div class="stat-card">
+                    <div class="stat-value">{rows:,}</div>
+                    <div class="stat-label">Rows</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{columns}</div>
+                    <div class="stat-label">Columns</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{missing}</div>
+                    <div class="stat-label">Missing Values</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{numeric}</div>
+                    <div class="stat-label">Numeric Columns</div>
+                </div>
+            </div>
+        </div>
+"""
+
+REPORT_SECTION_TEMPLATE = """
+        <div class="section">
+            <h2>{title}</h2>
+            <ul class="insight-list">
+{items}
+            </ul>
+        </div>
+"""
+
+REPORT_CHARTS_START = """
+        <div class="section">
+            <h2>📈 Generated Visualizations</h2>
+"""
+
+REPORT_CHART_TEMPLATE = """
+            <div style="margin-bottom: 40px; padding: 20px; background: #f8f9fa; border-radius: 8px;">
+                <h3>Chart {number}</h3>
+                {chart_html}
+            </div>
+"""
+
+REPORT_CHARTS_END = """
+        </div>
+"""
+
+REPORT_FOOTER = """
+        <div class="footer">
+            <p>Report generated by AI-powered Data Analysis Tool</p>
+            <p>Powered by Claude and GPT models • Interactive visualizations by Plotly</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# Static snapshot formats supported by export_chart_image
+STATIC_IMAGE_FORMATS = ('png', 'svg', 'webp')
+
+# Streamed data exports: rows serialized per chunk and text formats
+DEFAULT_EXPORT_CHUNK_ROWS = 50000
+TEXT_EXPORT_FORMATS = ('csv', 'json', 'ndjson')
+
+# Result keys rendered as list sections in reports, in order
+REPORT_SECTIONS = [
+    ('insights', '💡 Key Insights'),
+    ('patterns', '🔍 Detected Patterns'),
+    ('recommendations', '💭 Recommendations'),
+    ('anomalies', '⚠️ Detected Anomalies'),
+]
+
 
 class ExportHandler:
     """Handle exports and shareable links for visualizations and analysis"""
     
-    def __init__(self):
+    def __init__(self, visualization_store=None):
         self.base_url = "https://data-analysis-tool.streamlit.app"  # Replace with actual deployment URL
+        # Persistent store for shared links, opened on first share (see visualization_store.py)
+        self._visualization_store = visualization_store
+    
+    @property
+    def visualization_store(self):
+        if self._visualization_store is None:
+            from visualization_store import VisualizationStore
+            self._visualization_store = VisualizationStore()
+        return self._visualization_store
     
+    @traced("export.export_chart_html")
     def export_chart_html(self, fig) -> str:
         """Export Plotly chart as standalone HTML"""
         try:
@@ -23,268 +250,182 @@ class ExportHandler:
                 config={'displayModeBar': True, 'displaylogo': False}
             )
             
-            # Wrap in a complete HTML document
-            full_html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Data Analysis Chart - {datetime.now().strftime('%Y-%m-%d %H:%M')}</title>
-                <meta charset="utf-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-                <style>
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-                        margin: 0;
-                        padding: 20px;
-                        background-color: #f8f9fa;
-                    }}
-                    .header {{
-                        text-align: center;
-                        margin-bottom: 30px;
-                        color: #333;
-                    }}
-                    .chart-container {{
-                        background: white;
-                        border-radius: 8px;
-                        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                        padding: 20px;
-                        margin: 0 auto;
-                        max-width: 1200px;
-                    }}
-                    .footer {{
-                        text-align: center;
-                        margin-top: 30px;
-                        color: #666;
-                        font-size: 0.9em;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>📊 AI Data Analysis Tool</h1>
-                    <p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                </div>
-                <div class="chart-container">
-                    {html_str}
-                </div>
-                <div class="footer">
-                    <p>Created with AI-powered data analysis • Powered by Plotly</p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            return full_html
+            return self._render_chart_page(html_str)
             
         except Exception as e:
             raise Exception(f"Failed to export chart as HTML: {str(e)}")
     
-    def create_shareable_link(self, fig, session_id: str) -> str:
-        """Create shareable link for visualization"""
+    @traced("export.export_chart_compact")
+    def export_chart_compact(self, fig, plotlyjs_src: Optional[str] = None) -> str:
+        """Export Plotly chart as a small HTML page that references a shared plotly.js bundle
+        
+        plotlyjs_src is the script URL or relative path of the bundle written by
+        write_plotly_bundle; it defaults to the bundle file name next to the page.
+        """
         try:
-            # Generate unique ID for this visualization
-            viz_id = str(uuid.uuid4())
-            
-            # Convert figure to JSON
-            fig_json = fig.to_json()
-            
-            # In a real implementation, you would save this to a database
-            # For now, we'll create a mock shareable link
-            link = f"{self.base_url}/shared/{viz_id}?session={session_id}"
-            
-            # Store visualization data in session state (temporary solution)
-            if 'shared_visualizations' not in st.session_state:
-                st.session_state.shared_visualizations = {}
-            
-            st.session_state.shared_visualizations[viz_id] = {
-                'figure_json': fig_json,
-                'created_at': datetime.now().isoformat(),
-                'session_id': session_id
-            }
+            html_str = plotly.offline.plot(
+                fig,
+                include_plotlyjs=False,
+                output_type='div',
+                config={'displayModeBar': True, 'displaylogo': False}
+            )
+            src = plotlyjs_src or self.plotly_bundle_name()
+            return self._render_chart_page(html_str, f'<script src="{html.escape(src)}" charset="utf-8"></script>')
             
-            return link
+        except Exception as e:
+            raise Exception(f"Failed to export compact chart: {str(e)}")
+    
+    def plotly_bundle_name(self) -> str:
+        """File name of the shared plotly.js bundle for the installed Plotly version"""
+        return f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+    
+    def write_plotly_bundle(self, directory: str) -> str:
+        """Write the shared plotly.js bundle into directory once and return its path"""
+        path = os.path.join(directory, self.plotly_bundle_name())
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(plotly.offline.get_plotlyjs())
+            os.replace(tmp_path, path)
+        return path
+    
+    @traced("export.export_chart_image")
+    def export_chart_image(self, fig, image_format: str = 'png', width: Optional[int] = None,
+                           height: Optional[int] = None, scale: float = 1.0) -> bytes:
+        """Export a static PNG/SVG/WebP snapshot of a chart (requires kaleido)"""
+        image_format = image_format.lower()
+        if image_format not in STATIC_IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        try:
+            return fig.to_image(format=image_format, width=width, height=height, scale=scale)
+        except Exception as e:
+            raise Exception(f"Failed to export chart as {image_format} (requires kaleido): {str(e)}")
+    
+    @traced("export.batch_export_charts")
+    def batch_export_charts(self, figures: list, output_dir: str, export_format: str = 'html',
+                            max_workers: Optional[int] = None, name_prefix: str = 'chart') -> List[str]:
+        """Export many charts into output_dir on a worker pool and return the written paths
+        
+        export_format is 'html' (compact pages sharing one plotly.js bundle) or one of
+        the static image formats 'png', 'svg', 'webp'.
+        """
+        export_format = export_format.lower()
+        if export_format != 'html' and export_format not in STATIC_IMAGE_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        if export_format == 'html':
+            self.write_plotly_bundle(output_dir)
+        
+        def export_one(index_fig):
+            index, fig = index_fig
+            path = os.path.join(output_dir, f"{name_prefix}_{index + 1:03d}.{export_format}")
+            if export_format == 'html':
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(self.export_chart_compact(fig))
+            else:
+                with open(path, 'wb') as f:
+                    f.write(self.export_chart_image(fig, export_format))
+            return path
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(export_one, enumerate(figures)))
+    
+    def _render_chart_page(self, chart_html: str, plotlyjs: str = '') -> str:
+        """Wrap a chart div in the standalone chart page"""
+        now = datetime.now()
+        return CHART_PAGE_TEMPLATE.format(
+            title_time=now.strftime('%Y-%m-%d %H:%M'),
+            generated=now.strftime('%B %d, %Y at %I:%M %p'),
+            chart_html=chart_html,
+            plotlyjs=plotlyjs
+        )
+    
+    @traced("export.create_shareable_link")
+    def create_shareable_link(self, fig, session_id: str, ttl: Optional[int] = None) -> str:
+        """Create shareable link for visualization
+        
+        The figure is saved in the persistent visualization store (deduplicated by
+        content), so the link survives restarts and expires after ttl seconds.
+        """
+        try:
+            viz_id = self.visualization_store.put(fig.to_json(), session_id=session_id, ttl=ttl)
+            return f"{self.base_url}/?shared={viz_id}"
             
         except Exception as e:
             raise Exception(f"Failed to create shareable link: {str(e)}")
     
+    @traced("export.get_shared_visualization")
+    def get_shared_visualization(self, viz_id: str):
+        """Return the Plotly figure behind a shared link, or None if unknown or expired"""
+        try:
+            figure_json = self.visualization_store.get(viz_id)
+            if figure_json is None:
+                return None
+            return plotly.io.from_json(figure_json)
+            
+        except Exception as e:
+            raise Exception(f"Failed to load shared visualization: {str(e)}")
+    
+    def write_analysis_report(self, stream: TextIO, df, analysis_results: Dict[str, Any],
+                              figures: Optional[Iterable] = None, include_plotlyjs: Union[bool, str] = True) -> None:
+        """Render an HTML report section by section into a writable text stream"""
+        for chunk in self.iter_analysis_report(df, analysis_results, figures, include_plotlyjs):
+            stream.write(chunk)
+    
+    def iter_analysis_report(self, df, analysis_results: Dict[str, Any], figures: Optional[Iterable] = None,
+                             include_plotlyjs: Union[bool, str] = True) -> Iterator[str]:
+        """Yield an HTML report in chunks, suitable for files or streamed HTTP responses
+        
+        include_plotlyjs: True embeds plotly.js once in the document head, 'cdn' references
+        the CDN build, False leaves it out (only useful without figures).
+        """
+        figures = list(figures) if figures is not None else []
+        if not figures:
+            plotlyjs = ''
+        elif include_plotlyjs == 'cdn':
+            plotlyjs = f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+        elif include_plotlyjs:
+            plotlyjs = f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>'
+        else:
+            plotlyjs = ''
+        
+        yield REPORT_HEADER_TEMPLATE.format(
+            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            plotlyjs=plotlyjs,
+            rows=df.shape[0],
+            columns=df.shape[1],
+            missing=df.isnull().sum().sum(),
+            numeric=len(df.select_dtypes(include=['number']).columns)
+        )
+        
+        for key, title in REPORT_SECTIONS:
+            if analysis_results.get(key):
+                items = '\n'.join(f"                <li>{html.escape(str(item))}</li>" for item in analysis_results[key])
+                yield REPORT_SECTION_TEMPLATE.format(title=title, items=items)
+        
+        if figures:
+            yield REPORT_CHARTS_START
+            for i, fig in enumerate(figures):
+                chart_html = plotly.offline.plot(fig, include_plotlyjs=False, output_type='div')
+                yield REPORT_CHART_TEMPLATE.format(number=i + 1, chart_html=chart_html)
+            yield REPORT_CHARTS_END
+        
+        yield REPORT_FOOTER
+    
+    @traced("export.export_analysis_report")
     def export_analysis_report(self, df, analysis_results: Dict[str, Any], visualizations: list = None) -> str:
         """Export comprehensive analysis report as HTML"""
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Generate HTML report
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Data Analysis Report - {timestamp}</title>
-                <meta charset="utf-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-                <style>
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-                        line-height: 1.6;
-                        margin: 0;
-                        padding: 20px;
-                        background-color: #f8f9fa;
-                        color: #333;
-                    }}
-                    .container {{
-                        max-width: 1000px;
-                        margin: 0 auto;
-                        background: white;
-                        padding: 40px;
-                        border-radius: 10px;
-                        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-                    }}
-                    .header {{
-                        text-align: center;
-                        border-bottom: 2px solid #e9ecef;
-                        padding-bottom: 30px;
-                        margin-bottom: 40px;
-                    }}
-                    .header h1 {{
-                        color: #2c3e50;
-                        margin-bottom: 10px;
-                    }}
-                    .section {{
-                        margin-bottom: 40px;
-                    }}
-                    .section h2 {{
-                        color: #34495e;
-                        border-left: 4px solid #3498db;
-                        padding-left: 15px;
-                        margin-bottom: 20px;
-                    }}
-                    .insight-list {{
-                        background: #f8f9fa;
-                        padding: 20px;
-                        border-radius: 8px;
-                        border-left: 4px solid #28a745;
-                    }}
-                    .insight-list li {{
-                        margin-bottom: 10px;
-                    }}
-                    .data-summary {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                        gap: 20px;
-                        margin-bottom: 30px;
-                    }}
-                    .stat-card {{
-                        background: #e9ecef;
-                        padding: 20px;
-                        border-radius: 8px;
-                        text-align: center;
-                    }}
-                    .stat-value {{
-                        font-size: 2em;
-                        font-weight: bold;
-                        color: #3498db;
-                    }}
-                    .stat-label {{
-                        color: #666;
-                        margin-top: 5px;
-                    }}
-                    .footer {{
-                        text-align: center;
-                        margin-top: 50px;
-                        padding-top: 30px;
-                        border-top: 2px solid #e9ecef;
-                        color: #666;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🤖 AI Data Analysis Report</h1>
-                        <p>Generated on {timestamp}</p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📊 Dataset Overview</h2>
-                        <div class="data-summary">
-                            <div class="stat-card">
-                                <div class="stat-value">{df.shape[0]:,}</div>
-                                <div class="stat-label">Rows</div>
-                            </div>
-                            <div class="stat-card">
-                                <div class="stat-value">{df.shape[1]}</div>
-                                <div class="stat-label">Columns</div>
-                            </div>
-                            <div class="stat-card">
-                                <div class="stat-value">{df.isnull().sum().sum()}</div>
-                                <div class="stat-label">Missing Values</div>
-                            </div>
-                            <div class="stat-card">
-                                <div class="stat-value">{len(df.select_dtypes(include=['number']).columns)}</div>
-                                <div class="stat-label">Numeric Columns</div>
-                            </div>
-                        </div>
-                    </div>
-            """
-            
-            # Add AI insights
-            if analysis_results.get('insights'):
-                html_content += f"""
-                    <div class="section">
-                        <h2>💡 Key Insights</h2>
-                        <ul class="insight-list">
-                """
-                for insight in analysis_results['insights']:
-                    html_content += f"<li>{insight}</li>"
-                html_content += "</ul></div>"
-            
-            # Add patterns
-            if analysis_results.get('patterns'):
-                html_content += f"""
-                    <div class="section">
-                        <h2>🔍 Detected Patterns</h2>
-                        <ul class="insight-list">
-                """
-                for pattern in analysis_results['patterns']:
-                    html_content += f"<li>{pattern}</li>"
-                html_content += "</ul></div>"
-            
-            # Add recommendations
-            if analysis_results.get('recommendations'):
-                html_content += f"""
-                    <div class="section">
-                        <h2>💭 Recommendations</h2>
-                        <ul class="insight-list">
-                """
-                for rec in analysis_results['recommendations']:
-                    html_content += f"<li>{rec}</li>"
-                html_content += "</ul></div>"
-            
-            # Add anomalies
-            if analysis_results.get('anomalies'):
-                html_content += f"""
-                    <div class="section">
-                        <h2>⚠️ Detected Anomalies</h2>
-                        <ul class="insight-list">
-                """
-                for anomaly in analysis_results['anomalies']:
-                    html_content += f"<li>{anomaly}</li>"
-                html_content += "</ul></div>"
-            
-            # Close HTML
-            html_content += f"""
-                    <div class="footer">
-                        <p>Report generated by AI-powered Data Analysis Tool</p>
-                        <p>Powered by Claude and GPT models • Interactive visualizations by Plotly</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            return html_content
+            buffer = io.StringIO()
+            self.write_analysis_report(buffer, df, analysis_results, visualizations)
+            return buffer.getvalue()
             
         except Exception as e:
             raise Exception(f"Failed to export analysis report: {str(e)}")
     
+    @traced("export.export_data_csv")
     def export_data_csv(self, df) -> str:
         """Export DataFrame as CSV string"""
         try:
@@ -292,6 +433,7 @@ class ExportHandler:
         except Exception as e:
             raise Exception(f"Failed to export data as CSV: {str(e)}")
     
+    @traced("export.export_data_json")
     def export_data_json(self, df) -> str:
         """Export DataFrame as JSON string"""
         try:
@@ -299,41 +441,108 @@ class ExportHandler:
         except Exception as e:
             raise Exception(f"Failed to export data as JSON: {str(e)}")
     
-    def create_dashboard_export(self, df, analysis_results: Dict[str, Any], figures: list) -> str:
-        """Create comprehensive dashboard export with visualizations"""
+    def iter_data_export(self, df, export_format: str = 'csv', compression: Optional[str] = None,
+                         chunk_rows: int = DEFAULT_EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+        """Yield a CSV, JSON or NDJSON export in encoded chunks, optionally gzip/zstd compressed"""
+        export_format = export_format.lower()
+        if export_format not in TEXT_EXPORT_FORMATS:
+            raise ValueError(f"Unsupported streaming export format: {export_format}")
+        compressor = self._make_compressor(compression)
+        
+        for text in self._iter_data_text(df, export_format, chunk_rows):
+            data = text.encode('utf-8')
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        
+        if compressor is not None:
+            tail = compressor.flush()
+            if tail:
+                yield tail
+    
+    @traced("export.write_data_export")
+    def write_data_export(self, df, destination: Union[str, BinaryIO], export_format: str = 'csv',
+                          compression: Optional[str] = None, chunk_rows: int = DEFAULT_EXPORT_CHUNK_ROWS) -> None:
+        """Write a CSV, JSON, NDJSON or Parquet export to a path or binary stream chunk by chunk
+        
+        For Parquet, compression is the column codec (snappy, gzip, zstd); for text
+        formats it wraps the whole stream (gzip or zstd).
+        """
         try:
-            # Start with analysis report
-            html_content = self.export_analysis_report(df, analysis_results)
-            
-            # Add visualizations section
-            viz_section = """
-                <div class="section">
-                    <h2>📈 Generated Visualizations</h2>
-            """
-            
-            for i, fig in enumerate(figures):
-                chart_html = plotly.offline.plot(
-                    fig, 
-                    include_plotlyjs=True if i == 0 else False,  # Include JS only once
-                    output_type='div'
-                )
-                viz_section += f"""
-                    <div style="margin-bottom: 40px; padding: 20px; background: #f8f9fa; border-radius: 8px;">
-                        <h3>Chart {i+1}</h3>
-                        {chart_html}
-                    </div>
-                """
+            export_format = export_format.lower()
+            if export_format == 'parquet':
+                self._write_parquet(df, destination, compression or 'snappy', chunk_rows)
+                return
             
-            viz_section += "</div>"
-            
-            # Insert visualizations before footer
-            footer_pos = html_content.rfind('<div class="footer">')
-            if footer_pos != -1:
-                html_content = html_content[:footer_pos] + viz_section + html_content[footer_pos:]
+            if isinstance(destination, str):
+                with open(destination, 'wb') as f:
+                    for chunk in self.iter_data_export(df, export_format, compression, chunk_rows):
+                        f.write(chunk)
             else:
-                html_content += viz_section
-            
-            return html_content
+                for chunk in self.iter_data_export(df, export_format, compression, chunk_rows):
+                    destination.write(chunk)
+                    
+        except Exception as e:
+            raise Exception(f"Failed to export data as {export_format}: {str(e)}")
+    
+    def _iter_data_text(self, df, export_format: str, chunk_rows: int) -> Iterator[str]:
+        """Serialize a DataFrame slice by slice so only one chunk of text exists at a time"""
+        if export_format == 'json':
+            yield '['
+        
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            if export_format == 'csv':
+                yield chunk.to_csv(index=False, header=(start == 0))
+            elif export_format == 'ndjson':
+                yield chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+            else:
+                records = chunk.to_json(orient='records')[1:-1]
+                yield records if start == 0 else ',' + records
+        
+        if export_format == 'csv' and len(df) == 0:
+            yield df.to_csv(index=False)
+        if export_format == 'json':
+            yield ']'
+    
+    def _make_compressor(self, compression: Optional[str]):
+        """Return a streaming compressor with compress()/flush(), or None"""
+        if compression is None or compression == 'none':
+            return None
+        if compression == 'gzip':
+            # wbits=31 writes a gzip header and trailer
+            return zlib.compressobj(6, zlib.DEFLATED, 31)
+        if compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("zstd compression requires the zstandard package (pip install zstandard)")
+            return zstandard.ZstdCompressor().compressobj()
+        raise ValueError(f"Unsupported compression: {compression}")
+    
+    def _write_parquet(self, df, destination: Union[str, BinaryIO], compression: str, chunk_rows: int) -> None:
+        """Write Parquet one row group per chunk"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+        
+        # Infer from the whole frame: an empty or all-null prefix would type object columns as null
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(destination, schema, compression=compression) as writer:
+            for start in range(0, len(df), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    
+    @traced("export.create_dashboard_export")
+    def create_dashboard_export(self, df, analysis_results: Dict[str, Any], figures: list) -> str:
+        """Create comprehensive dashboard export with visualizations"""
+        try:
+            buffer = io.StringIO()
+            self.write_analysis_report(buffer, df, analysis_results, figures)
+            return buffer.getvalue()
             
         except Exception as e:
             raise Exception(f"Failed to create dashboard export: {str(e)}")
@@ -0,0 +1,314 @@
+import hashlib
+import io
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Number of minimum hash values kept per column for distinct-count estimates
+SKETCH_SIZE = 1024
+
+# Rows hashed per chunk when profiling duplicates and keys (bounds temporaries on large frames)
+HASH_CHUNK_ROWS = 250_000
+
+# Columns whose value hashes are kept for composite-key checks and appends
+# (unique columns first, then by distinct count)
+MAX_KEY_COLUMNS = 12
+
+# Columns with at least this share of distinct values, but some repeats, are reported as near-unique
+NEAR_UNIQUE_RATIO = 0.99
+
+# Golden-ratio constant of boost's hash_combine
+HASH_COMBINE_SEED = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """Return 64-bit hashes of the non-null values of a series"""
+    return pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy(dtype=np.uint64)
+
+
+def build_sketch(hashes: np.ndarray, k: int = SKETCH_SIZE) -> np.ndarray:
+    """Keep the k smallest distinct hashes (KMV sketch)"""
+    # Hash-based dedup and partial selection instead of sorting every value
+    unique = pd.unique(hashes)
+    if len(unique) > k:
+        unique = np.partition(unique, k - 1)[:k]
+    return np.sort(unique)
+
+
+def merge_sketches(left: np.ndarray, right: np.ndarray, k: int = SKETCH_SIZE) -> np.ndarray:
+    """Merge two KMV sketches without access to the original values"""
+    return np.unique(np.concatenate([left, right]))[:k]
+
+
+def estimate_distinct(sketch: np.ndarray, k: int = SKETCH_SIZE) -> int:
+    """Estimate the number of distinct values from a KMV sketch"""
+    if len(sketch) < k:
+        return int(len(sketch))
+    kth = float(sketch[k - 1]) / float(np.iinfo(np.uint64).max)
+    return int(round((k - 1) / kth)) if kth > 0 else int(len(sketch))
+
+
+def profile_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """Build a mergeable profile (counts, sums, extrema, sketches) for a DataFrame"""
+    profile = {'rows': len(df), 'columns': {}}
+    for col in df.columns:
+        series = df[col]
+        non_null = series.dropna()
+        col_profile = {
+            'count': int(len(non_null)),
+            'missing': int(len(series) - len(non_null)),
+            'sum': None,
+            'min': None,
+            'max': None,
+            'sketch': build_sketch(hash_values(series))
+        }
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            col_profile['sum'] = float(non_null.sum())
+        if len(non_null) > 0 and (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)):
+            col_profile['min'] = non_null.min()
+            col_profile['max'] = non_null.max()
+        profile['columns'][col] = col_profile
+    return profile
+
+
+def merge_profiles(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge the profile of appended rows into the profile of the existing rows"""
+    merged = {'rows': old['rows'] + new['rows'], 'columns': {}}
+    for col, old_col in old['columns'].items():
+        new_col = new['columns'].get(col)
+        if new_col is None:
+            merged['columns'][col] = old_col
+            continue
+        merged['columns'][col] = {
+            'count': old_col['count'] + new_col['count'],
+            'missing': old_col['missing'] + new_col['missing'],
+            'sum': None if old_col['sum'] is None or new_col['sum'] is None else old_col['sum'] + new_col['sum'],
+            'min': _combine(old_col['min'], new_col['min'], min),
+            'max': _combine(old_col['max'], new_col['max'], max),
+            'sketch': merge_sketches(old_col['sketch'], new_col['sketch'])
+        }
+    return merged
+
+
+def _combine(left, right, op):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return op(left, right)
+
+
+def summarize_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a mergeable profile into plain per-column statistics"""
+    summary = {}
+    for col, col_profile in profile['columns'].items():
+        count = col_profile['count']
+        summary[col] = {
+            'count': count,
+            'missing': col_profile['missing'],
+            'sum': col_profile['sum'],
+            'mean': col_profile['sum'] / count if col_profile['sum'] is not None and count else None,
+            'min': col_profile['min'],
+            'max': col_profile['max'],
+            'distinct_estimate': estimate_distinct(col_profile['sketch'])
+        }
+    return summary
+
+
+def hash_column(series: pd.Series, chunk_rows: int = HASH_CHUNK_ROWS) -> np.ndarray:
+    """Return 64-bit hashes of every value of a series (nulls included), hashed chunk by chunk"""
+    hashes = np.empty(len(series), dtype=np.uint64)
+    for start in range(0, len(series), chunk_rows):
+        chunk = series.iloc[start:start + chunk_rows]
+        hashes[start:start + len(chunk)] = pd.util.hash_pandas_object(chunk, index=False).to_numpy(dtype=np.uint64)
+    return hashes
+
+
+def combine_hashes(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Order-dependent mix of two hash arrays (boost hash_combine, vectorized, wrapping on overflow)"""
+    return left ^ (right + HASH_COMBINE_SEED + (left << np.uint64(6)) + (left >> np.uint64(2)))
+
+
+def count_distinct(hashes: np.ndarray) -> int:
+    """Exact number of distinct hashes (hash table, no sort)"""
+    return int(pd.unique(hashes).size)
+
+
+def build_hash_profile(df: pd.DataFrame, chunk_rows: int = HASH_CHUNK_ROWS) -> Dict[str, Any]:
+    """Hash every column once and derive row hashes, distinct and null counts in the same pass
+
+    Only the hashes of up to MAX_KEY_COLUMNS key-like columns are kept, so the
+    profile holds about (MAX_KEY_COLUMNS + 1) * 8 bytes per row.
+    """
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    column_hashes, distinct, nulls, sketches = {}, {}, {}, {}
+    for col in df.columns:
+        hashes = hash_column(df[col], chunk_rows)
+        row_hashes = combine_hashes(row_hashes, hashes)
+        missing = df[col].isna().to_numpy()
+        distinct[col] = count_distinct(hashes)
+        nulls[col] = int(missing.sum())
+        sketches[col] = build_sketch(hashes[~missing])
+        column_hashes[col] = hashes
+        if len(column_hashes) > MAX_KEY_COLUMNS:
+            column_hashes.pop(min(column_hashes, key=lambda c: _key_rank(c, distinct, nulls, len(df))))
+    return {
+        'rows': len(df),
+        'columns': list(df.columns),
+        # Values hash differently per dtype (2 vs 2.0), so appends must keep these
+        'dtypes': df.dtypes.to_dict(),
+        'row_hashes': row_hashes,
+        'column_hashes': column_hashes,
+        'distinct': distinct,
+        'nulls': nulls,
+        'sketches': sketches
+    }
+
+
+def _key_rank(col: str, distinct: Dict[str, int], nulls: Dict[str, int], rows: int) -> Tuple[bool, int]:
+    return (nulls[col] == 0 and distinct[col] == rows, distinct[col])
+
+
+def extend_hash_profile(profile: Dict[str, Any], tail: pd.DataFrame,
+                        chunk_rows: int = HASH_CHUNK_ROWS) -> Optional[Dict[str, Any]]:
+    """Add appended rows to a hash profile, hashing only the new rows
+
+    Distinct counts stay exact for kept columns and become KMV estimates for the
+    others (a repeated value never disappears, so those can't turn into keys).
+    tail must carry the dtypes of the combined frame (take it from the
+    concatenation). Returns None when a column's dtype changed or a unique
+    column's hashes were not kept; rebuild in that case.
+    """
+    if list(tail.columns) != profile['columns'] or tail.dtypes.to_dict() != profile['dtypes']:
+        return None
+    rows = profile['rows'] + len(tail)
+    row_hashes = np.zeros(len(tail), dtype=np.uint64)
+    column_hashes, distinct, nulls, sketches = {}, {}, {}, {}
+    for col in profile['columns']:
+        hashes = hash_column(tail[col], chunk_rows)
+        row_hashes = combine_hashes(row_hashes, hashes)
+        missing = tail[col].isna().to_numpy()
+        nulls[col] = profile['nulls'][col] + int(missing.sum())
+        sketches[col] = merge_sketches(profile['sketches'][col], build_sketch(hashes[~missing]))
+        if col in profile['column_hashes']:
+            column_hashes[col] = np.concatenate([profile['column_hashes'][col], hashes])
+            distinct[col] = count_distinct(column_hashes[col])
+        elif profile['nulls'][col] == 0 and profile['distinct'][col] == profile['rows']:
+            return None
+        else:
+            estimate = estimate_distinct(sketches[col]) + (nulls[col] > 0)
+            distinct[col] = min(max(profile['distinct'][col], estimate), rows - 1)
+    return {
+        'rows': rows,
+        'columns': profile['columns'],
+        'dtypes': profile['dtypes'],
+        'row_hashes': np.concatenate([profile['row_hashes'], row_hashes]),
+        'column_hashes': column_hashes,
+        'distinct': distinct,
+        'nulls': nulls,
+        'sketches': sketches
+    }
+
+
+def summarize_keys(profile: Dict[str, Any], near_unique_ratio: float = NEAR_UNIQUE_RATIO) -> Dict[str, Any]:
+    """Duplicate rows, candidate keys (single columns and pairs) and near-unique columns of a hash profile
+
+    Counts are exact up to 64-bit hash collisions (about rows^2 / 2^65 expected).
+    """
+    rows = profile['rows']
+    duplicate_rows = rows - count_distinct(profile['row_hashes']) if rows else 0
+    distinct, nulls = profile['distinct'], profile['nulls']
+
+    unique_columns = [col for col in profile['columns'] if nulls[col] == 0 and distinct[col] == rows and rows]
+    near_unique = {
+        col: distinct[col] / rows for col in profile['columns']
+        if rows and col not in unique_columns and distinct[col] >= near_unique_ratio * rows
+    }
+
+    # Pairs only exist without duplicate rows; skip pairs whose distinct counts can't cover every row
+    candidate_keys = [[col] for col in unique_columns]
+    if rows and duplicate_rows == 0:
+        kept = [col for col in profile['column_hashes'] if col not in unique_columns and nulls[col] == 0]
+        for i, left in enumerate(kept):
+            for right in kept[i + 1:]:
+                if distinct[left] * distinct[right] < rows:
+                    continue
+                combined = combine_hashes(profile['column_hashes'][left], profile['column_hashes'][right])
+                if count_distinct(combined) == rows:
+                    candidate_keys.append([left, right])
+
+    return {
+        'rows': rows,
+        'duplicate_rows': int(duplicate_rows),
+        'unique_columns': unique_columns,
+        'near_unique_columns': near_unique,
+        'candidate_keys': candidate_keys
+    }
+
+
+class IncrementalProfiler:
+    """Cache loaded versions of CSV files and re-profile only rows appended since the last version"""
+
+    # Number of file versions kept in memory
+    MAX_CACHED_VERSIONS = 4
+
+    def __init__(self):
+        # cache key -> prior version state
+        self._versions: OrderedDict = OrderedDict()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached version for a file, if any"""
+        return self._versions.get(cache_key)
+
+    def store(self, cache_key: str, content: bytes, df: pd.DataFrame, raw_columns: list,
+              encoding: str, raw_rows: int, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Remember a fully loaded version of a file"""
+        version = {
+            'length': len(content),
+            'digest': hashlib.sha256(content).hexdigest(),
+            'df': df,
+            'raw_columns': raw_columns,
+            'encoding': encoding,
+            'raw_rows': raw_rows,
+            # Built on first use (get_profile), so a fresh load is not profiled up front
+            'profile': profile,
+            'appended_rows': 0
+        }
+        self._versions[cache_key] = version
+        self._versions.move_to_end(cache_key)
+        while len(self._versions) > self.MAX_CACHED_VERSIONS:
+            self._versions.popitem(last=False)
+        return version
+
+    def get_profile(self, version: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a version's mergeable profile, building it the first time it is needed"""
+        if version['profile'] is None:
+            version['profile'] = profile_frame(version['df'])
+        return version['profile']
+
+    def match(self, cache_key: str, content: bytes) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Classify new content against the cached version: 'same', 'append' or 'changed'"""
+        version = self._versions.get(cache_key)
+        if version is None or len(content) < version['length']:
+            return 'changed', None
+        old_length = version['length']
+        if hashlib.sha256(content[:old_length]).hexdigest() != version['digest']:
+            return 'changed', None
+        self._versions.move_to_end(cache_key)
+        if len(content) == old_length:
+            return 'same', version
+        # The old version must end on a row boundary for the tail to parse on its own
+        if old_length == 0 or content[old_length - 1:old_length] not in (b'\n', b'\r'):
+            return 'changed', None
+        return 'append', version
+
+    def parse_tail(self, version: Dict[str, Any], content: bytes) -> pd.DataFrame:
+        """Parse only the bytes appended after the cached version"""
+        tail = content[version['length']:]
+        return pd.read_csv(
+            io.BytesIO(tail),
+            header=None,
+            names=version['raw_columns'],
+            encoding=version['encoding']
+        )
@@ -0,0 +1,239 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Spans kept in memory across all sessions
+MAX_SPANS = 5000
+
+
+class Span:
+    """One timed operation with free-form attributes (rows, bytes, tokens, ...)"""
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """Attach attributes, e.g. span.set(rows=len(df), prompt_tokens=120)"""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'thread_id': self.thread_id,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration * 1000, 3),
+            'error': self.error,
+            **self.attributes
+        }
+
+
+class _SpanContext:
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = self.tracer._current.get()
+        self.span = Span(self.name, next(self.tracer._ids), parent.span_id if parent else None, self.attributes)
+        self._token = self.tracer._current.set(self.span)
+        self._memory_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self._start
+        if self._memory_start is not None and tracemalloc.is_tracing():
+            self.span.set(bytes_allocated=max(tracemalloc.get_traced_memory()[0] - self._memory_start, 0))
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._current.reset(self._token)
+        self.tracer._record(self.span)
+        return False
+
+
+class Tracer:
+    """Collect spans from the analytics pipeline and export them as traces or metrics"""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._current: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+    def span(self, name: str, **attributes) -> _SpanContext:
+        """Context manager timing a block: with tracer.span('data.load', rows=10) as span: ..."""
+        return _SpanContext(self, name, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        """The innermost open span of the running thread, if any"""
+        return self._current.get()
+
+    def annotate(self, **attributes):
+        """Attach attributes to the current span, if one is open"""
+        span = self._current.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def mark(self) -> int:
+        """Return a marker; spans(since=marker) only returns spans started after it"""
+        return next(self._ids)
+
+    def _record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, since: int = 0, thread_id: Optional[int] = None) -> List[Span]:
+        """Finished spans, optionally only those after a marker and from one thread"""
+        with self._lock:
+            spans = list(self._spans)
+        return [
+            s for s in spans
+            if s.span_id > since and (thread_id is None or s.thread_id == thread_id)
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def to_chrome_trace(self, spans: Optional[List[Span]] = None) -> str:
+        """Export spans in the Trace Event Format (chrome://tracing, Perfetto, speedscope)"""
+        spans = self.spans() if spans is None else spans
+        events = [{
+            'name': s.name,
+            'cat': s.name.split('.')[0],
+            'ph': 'X',
+            'ts': int(s.start_time * 1_000_000),
+            'dur': int(s.duration * 1_000_000),
+            'pid': os.getpid(),
+            'tid': s.thread_id,
+            'args': {**s.attributes, **({'error': s.error} if s.error else {})}
+        } for s in spans]
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, default=str)
+
+    def to_prometheus(self, spans: Optional[List[Span]] = None) -> str:
+        """Export per-operation totals in the Prometheus text exposition format"""
+        spans = self.spans() if spans is None else spans
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in spans:
+            total = totals.setdefault(s.name, Counter())
+            total['count'] += 1
+            total['seconds'] += s.duration
+            total['errors'] += 1 if s.error else 0
+            for key in ('rows', 'bytes_allocated', 'prompt_tokens', 'response_tokens', 'cached_tokens'):
+                value = s.attributes.get(key)
+                if isinstance(value, (int, float)):
+                    total[key] += value
+
+        metrics = [
+            ('void_span_calls_total', 'count', 'Number of calls'),
+            ('void_span_duration_seconds_total', 'seconds', 'Total wall time'),
+            ('void_span_errors_total', 'errors', 'Number of failed calls'),
+            ('void_span_rows_total', 'rows', 'Rows processed'),
+            ('void_span_bytes_allocated_total', 'bytes_allocated', 'Bytes allocated (when memory tracking is on)'),
+            ('void_span_prompt_tokens_total', 'prompt_tokens', 'LLM prompt tokens'),
+            ('void_span_response_tokens_total', 'response_tokens', 'LLM response tokens'),
+            ('void_span_cached_tokens_total', 'cached_tokens', 'LLM prompt tokens read from the provider cache'),
+        ]
+        lines = []
+        for metric, key, help_text in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, total in sorted(totals.items()):
+                if key in total:
+                    lines.append(f'{metric}{{operation="{name}"}} {total[key]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared tracer used by the analytics modules
+tracer = Tracer()
+
+
+def _count_rows(value: Any) -> Optional[int]:
+    """Row count of DataFrame-like values (anything with columns and a length)"""
+    if hasattr(value, 'columns') and hasattr(value, '__len__'):
+        return len(value)
+    return None
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording a span per call; rows come from the returned or first DataFrame"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name) as span:
+                result = func(*args, **kwargs)
+                rows = _count_rows(result)
+                if rows is None:
+                    rows = next((r for r in map(_count_rows, itertools.chain(args, kwargs.values())) if r is not None), None)
+                if 'rows' not in span.attributes:
+                    span.set(rows=rows)
+                if isinstance(result, (str, bytes)):
+                    span.set(output_bytes=len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """Opt-in statistical profiler sampling the stacks of one thread at a fixed interval"""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='void-sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed_stacks(self) -> str:
+        """Samples in the collapsed-stack format read by flamegraph.pl and speedscope"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by share of samples in which they were on top of the stack"""
+        total = sum(self.samples.values())
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [
+            {'function': function, 'samples': count, 'percent': round(100 * count / total, 1)}
+            for function, count in leaves.most_common(limit)
+        ] if total else []
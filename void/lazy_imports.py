@@ -0,0 +1,54 @@
+import importlib
+import sys
+import time
+import types
+from typing import Dict
+
+from instrumentation import tracer
+
+# Heavy modules timed by measure_import_times (first import in a fresh process)
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly.express', 'plotly.graph_objects', 'anthropic', 'openai']
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with tracer.span(f"import.{self.__name__}"):
+                module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """Return the module if it is already imported, otherwise a LazyModule proxy for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def measure_import_times(modules=None) -> Dict[str, float]:
+    """Seconds spent importing each module not yet loaded (0.0 if already imported, None if not installed)"""
+    timings = {}
+    for name in modules or HEAVY_MODULES:
+        if name in sys.modules:
+            timings[name] = 0.0
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            timings[name] = None
+            continue
+        timings[name] = round(time.perf_counter() - start, 4)
+    return timings
@@ -1,15 +1,19 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
+import threading
+import time
+import tracemalloc
 from typing import Optional
 import traceback
 
 # Import our utility classes (imports directs dans le même dossier)
-from data_processor import DataProcessor
-from ai_analyzer import AIAnalyzer
-from visualization import VisualizationGenerator
-from export_handler import ExportHandler
+# pandas, numpy and the analytics modules (plotly, AI SDKs) load on first use so the
+# landing page paints without them; see the get_* loaders below
+from instrumentation import SamplingProfiler, tracer
+from lazy_imports import lazy_module
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
 
 # Page config
 st.set_page_config(
@@ -19,42 +23,257 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize utilities
+# Local directory of datasets already on the analytics host (optional)
+LOCAL_DATA_DIR = os.environ.get('VOID_DATA_DIR')
+
+# Preview pagination
+PREVIEW_ROW_PAGE_SIZES = [10, 50, 100]
+COLUMN_PAGE_SIZE = 50
+
+# Columns shown in the Performance panel
+PERFORMANCE_COLUMNS = [
+    'name', 'duration_ms', 'rows', 'output_bytes', 'bytes_allocated',
+    'provider', 'prompt_tokens', 'cached_tokens', 'response_tokens', 'error'
+]
+
+# Datasets with at least this many rows open in progressive mode (sample first, exact later)
+PROGRESSIVE_MIN_ROWS = 200_000
+# Seconds between checks for the exact result while an approximate view is shown
+PROGRESSIVE_POLL_SECONDS = 1.0
+
+# Allocation tracking at startup (VOID_TRACK_MEMORY=1); tracemalloc is global to the
+# server process, so this is one setting shared by every session
+TRACK_MEMORY_DEFAULT = os.environ.get('VOID_TRACK_MEMORY', '').lower() in ('1', 'true', 'yes')
+
+# Candidate keys and near-unique columns listed before truncating
+MAX_LISTED_KEYS = 10
+
+# Initialize utilities (each one is imported and built the first time a page needs it)
+@st.cache_resource
+def get_data_processor():
+    """Initialize and cache the data processor"""
+    with tracer.span("startup.data_processor"):
+        from data_processor import DataProcessor
+        return DataProcessor()
+
+@st.cache_resource
+def get_viz_generator():
+    """Initialize and cache the chart generator (imports plotly)"""
+    with tracer.span("startup.viz_generator"):
+        from visualization import VisualizationGenerator
+        return VisualizationGenerator()
+
+@st.cache_resource
+def get_export_handler():
+    """Initialize and cache the export handler (and its shared-visualization store)"""
+    with tracer.span("startup.export_handler"):
+        from export_handler import ExportHandler
+        return ExportHandler()
+
+@st.cache_resource
+def get_ai_analyzer():
+    """Initialize and cache the AI analyzer; None when no API key is set
+
+    The SDK clients themselves are created on the first AI request.
+    """
+    with tracer.span("startup.ai_analyzer"):
+        from ai_analyzer import AIAnalyzer
+        try:
+            return AIAnalyzer()
+        except ValueError:
+            return None  # No API keys available
+
+@st.cache_resource
+def get_process_info():
+    """Per-process startup record shared by all sessions (first run = cold start)"""
+    return {'started_at': time.time(), 'runs': 0, 'cold_start_ms': None}
+
 @st.cache_resource
-def get_utilities():
-    """Initialize and cache utility classes"""
-    data_processor = DataProcessor()
-    viz_generator = VisualizationGenerator()
-    export_handler = ExportHandler()
+def get_memory_tracking():
+    """Process-wide allocation-tracking switch shared by all sessions"""
+    if TRACK_MEMORY_DEFAULT and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return {'enabled': TRACK_MEMORY_DEFAULT, 'lock': threading.Lock()}
+
+def set_memory_tracking(enabled: bool):
+    """Start or stop tracemalloc for the whole process"""
+    settings = get_memory_tracking()
+    with settings['lock']:
+        settings['enabled'] = enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def render_column_pager(df: "pd.DataFrame", key: str) -> int:
+    """Render a column page selector and return the zero-based page index"""
+    col_pages = max(1, -(-len(df.columns) // COLUMN_PAGE_SIZE))
+    if col_pages == 1:
+        return 0
+    page = st.number_input(
+        f"Column page (1-{col_pages}, {COLUMN_PAGE_SIZE} columns per page)",
+        min_value=1, max_value=col_pages, value=1, key=f"{key}_col_page"
+    )
+    return page - 1
+
+def render_performance_panel(run_mark: int, profiler: Optional[SamplingProfiler]):
+    """Show spans recorded during this run, with trace/metrics downloads and profiler results"""
+    with st.expander("⏱️ Performance", expanded=False):
+        process_info = get_process_info()
+        if process_info['cold_start_ms'] is not None:
+            st.caption(
+                f"Cold start (first run of this worker process): {process_info['cold_start_ms']:,.0f} ms · "
+                f"{process_info['runs']} runs since start"
+            )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            # The checkbox mirrors the shared setting, which another session may have changed
+            st.session_state["perf_track_memory"] = get_memory_tracking()['enabled']
+            st.checkbox(
+                "Track memory allocations (all sessions)", key="perf_track_memory",
+                on_change=lambda: set_memory_tracking(st.session_state["perf_track_memory"]),
+                help="Records bytes allocated per span with tracemalloc (slower, applies to the whole server process)"
+            )
+        with col2:
+            st.checkbox(
+                "Sampling profiler", key="perf_profiler",
+                help="Samples the call stack of each run; takes effect on the next interaction"
+            )
+        
+        spans = tracer.spans(since=run_mark, thread_id=threading.get_ident())
+        if spans:
+            span_df = pd.DataFrame([span.to_dict() for span in spans])
+            columns = [c for c in PERFORMANCE_COLUMNS if c in span_df.columns]
+            st.dataframe(span_df[columns], use_container_width=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "Download trace (Chrome/Perfetto JSON)", tracer.to_chrome_trace(spans),
+                    file_name="void_trace.json", mime="application/json"
+                )
+            with col2:
+                st.download_button(
+                    "Download metrics (Prometheus text)", tracer.to_prometheus(spans),
+                    file_name="void_metrics.prom", mime="text/plain"
+                )
+        else:
+            st.write("No instrumented operations ran during this interaction.")
+        
+        if profiler is not None and profiler.samples:
+            st.write("**Sampling profiler — top functions:**")
+            st.dataframe(pd.DataFrame(profiler.top_functions()), use_container_width=True)
+            st.download_button(
+                "Download collapsed stacks (flamegraph)", profiler.collapsed_stacks(),
+                file_name="void_profile.folded", mime="text/plain"
+            )
+
+def main():
+    """Run the app with timing spans, optional memory tracking and optional sampling profiler"""
+    get_memory_tracking()
+    
+    profiler = None
+    if st.session_state.get("perf_profiler"):
+        profiler = SamplingProfiler()
+        profiler.start()
+    
+    process_info = get_process_info()
+    process_info['runs'] += 1
+    cold_start = process_info['runs'] == 1
     
-    # AI Analyzer - handle case where API keys are missing
-    ai_analyzer = None
+    run_mark = tracer.mark()
     try:
-        ai_analyzer = AIAnalyzer()
-    except ValueError:
-        pass  # No API keys available
+        with tracer.span("app.run", cold_start=cold_start) as span:
+            render_app()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if cold_start:
+            process_info['cold_start_ms'] = round(span.duration * 1000, 1)
+    render_performance_panel(run_mark, profiler)
+
+@st.fragment(run_every=PROGRESSIVE_POLL_SECONDS)
+def poll_refinement(task_key):
+    """Rerun the app once the exact result behind an approximate view is ready"""
+    if get_data_processor().is_refined(task_key):
+        st.rerun()
+
+def render_progressive(task_key, func, df: "pd.DataFrame", sample: "pd.DataFrame", render):
+    """Render func's result on the full data, or on the sample if the exact one is not ready in time
     
-    return data_processor, ai_analyzer, viz_generator, export_handler
+    Task keys start with the dataset key, which scopes the cached exact results.
+    """
+    outcome = get_data_processor().run_progressive(task_key, func, df, sample, dataset_key=task_key[0])
+    render(outcome['result'])
+    if outcome['approximate']:
+        st.caption(
+            f"≈ Approximate: computed on a {outcome['sample_rows']:,}-row sample of "
+            f"{outcome['total_rows']:,} rows; refining to the exact result…"
+        )
+        poll_refinement(task_key)
 
-def main():
-    """Main Streamlit application"""
+def render_shared_visualization(viz_id: str):
+    """Show a chart opened from a shared link (?shared=<id>)"""
+    st.header("🔗 Shared Visualization")
+    try:
+        fig = get_export_handler().get_shared_visualization(viz_id)
+    except Exception as e:
+        st.error(f"❌ {str(e)}")
+        return
+    if fig is None:
+        st.warning("This shared link does not exist or has expired.")
+    else:
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_app():
+    """Render the analytics pages"""
+    
+    shared_id = st.query_params.get("shared")
+    if shared_id:
+        render_shared_visualization(shared_id)
+        return
     
     # Header
     st.title("⚫ VOID - The All-Seeing Data Analyst")
     st.markdown("***Manipulate destiny through data insights - Member of the God Hand***")
     st.markdown("Upload your data and witness the dark power of analytical divination.")
     
-    # Initialize utilities
-    data_processor, ai_analyzer, viz_generator, export_handler = get_utilities()
-    
     # Sidebar for file upload
     with st.sidebar:
         st.header("📁 Data Upload")
-        uploaded_file = st.file_uploader(
-            "Choose a CSV or JSON file",
-            type=["csv", "json"],
-            help="Upload your data file to begin analysis"
-        )
+        data_source = "Upload file"
+        if LOCAL_DATA_DIR and os.path.isdir(LOCAL_DATA_DIR):
+            data_source = st.radio("Data source", ["Upload file", "Local directory"])
+        
+        uploaded_file = None
+        local_dataset = None
+        local_columns = None
+        if data_source == "Upload file":
+            uploaded_file = st.file_uploader(
+                "Choose a CSV or JSON file",
+                type=["csv", "json"],
+                help="Upload your data file to begin analysis"
+            )
+        else:
+            data_processor = get_data_processor()
+            local_datasets = data_processor.list_local_datasets(LOCAL_DATA_DIR)
+            if local_datasets:
+                local_dataset = st.selectbox(
+                    "Dataset", local_datasets,
+                    help=f"CSV/Parquet files and partitioned directories in {LOCAL_DATA_DIR}"
+                )
+                try:
+                    available_columns = data_processor.get_local_columns(LOCAL_DATA_DIR, local_dataset)
+                    local_columns = st.multiselect(
+                        "Columns to load (all if empty)", available_columns,
+                        help="Only the selected columns are read from disk"
+                    ) or None
+                except Exception as e:
+                    st.error(f"Cannot read dataset schema: {str(e)}")
+                    local_dataset = None
+            else:
+                st.info(f"No CSV or Parquet datasets found in {LOCAL_DATA_DIR}")
         
         # Show API key status
         st.header("🔑 AI Features")
@@ -72,11 +291,45 @@ def main():
             st.info("Add ANTHROPIC_API_KEY or OPENAI_API_KEY for AI features")
     
     # Main content area
-    if uploaded_file is not None:
+    if uploaded_file is not None or local_dataset is not None:
         try:
             # Load and process data
+            incremental_summary = None
+            incremental_file = None
+            data_processor = get_data_processor()
+            # Estimate the in-memory size first: full, compacted or sampled load, or refusal
+            if uploaded_file is not None:
+                load_plan = data_processor.plan_load(uploaded_file=uploaded_file)
+            else:
+                load_plan = data_processor.plan_load(root=LOCAL_DATA_DIR, dataset=local_dataset, columns=local_columns)
+            if load_plan['mode'] == 'refuse':
+                st.error(f"🛑 Dataset not loaded: {load_plan['reason']}")
+                st.info("Select fewer columns, upload a smaller file or raise VOID_MEMORY_BUDGET_MB")
+                return
+            
             with st.spinner("📊 Loading and processing data..."):
-                df = data_processor.load_file(uploaded_file)
+                if uploaded_file is not None:
+                    df = data_processor.load_planned(load_plan, uploaded_file=uploaded_file)
+                    if load_plan['mode'] == 'full':
+                        incremental_file = uploaded_file.name
+                        incremental_summary = data_processor.get_incremental_summary(incremental_file, appended_only=True)
+                    source_size = uploaded_file.size
+                    dataset_key = f"{uploaded_file.name}:{uploaded_file.size}:{getattr(uploaded_file, 'file_id', '')}"
+                else:
+                    df = data_processor.load_planned(load_plan, root=LOCAL_DATA_DIR, dataset=local_dataset, columns=local_columns)
+                    # Size of the dataset's data files only
+                    mtime_ns, source_size, _ = data_processor.local_dataset_version(LOCAL_DATA_DIR, local_dataset)
+                    dataset_key = f"local:{local_dataset}:{','.join(local_columns or [])}:{mtime_ns}:{source_size}"
+                dataset_key += f":{load_plan['mode']}"
+            if load_plan['mode'] == 'sample':
+                st.warning(
+                    f"⚠️ Too large for the memory budget: showing a uniform sample of {len(df):,} "
+                    f"of about {load_plan['estimated_rows']:,} rows"
+                )
+            elif load_plan['mode'] == 'compact':
+                st.info("🗜️ Loaded with compact column types (downcast numbers, categorical text) to fit the memory budget")
+            if incremental_summary:
+                st.info(f"➕ {incremental_summary['appended_rows']:,} appended rows profiled incrementally")
             
             # Display data overview
             st.header("📋 Data Overview")
@@ -87,26 +340,67 @@ def main():
             with col2:
                 st.metric("📋 Total Columns", len(df.columns))
             with col3:
-                st.metric("💾 File Size", f"{uploaded_file.size:,} bytes")
+                st.metric("💾 File Size", f"{source_size:,} bytes")
+            estimated_mb = load_plan['estimated_bytes'] / 1024 ** 2
+            st.caption(
+                f"🧠 Memory ({load_plan['mode']} load): estimated {estimated_mb:,.1f} MB, "
+                f"actual {load_plan['actual_bytes'] / 1024 ** 2:,.1f} MB · budget {load_plan['budget_bytes'] / 1024 ** 2:,.0f} MB, "
+                f"{load_plan['in_use_bytes'] / 1024 ** 2:,.0f} MB in use before loading"
+            )
             
-            # Show data preview
+            # Progressive mode: summaries and charts show a sample-based result at once
+            # and switch to the exact one when the background computation finishes
+            sample = df
+            prog_col1, prog_col2 = st.columns(2)
+            with prog_col1:
+                progressive = st.toggle(
+                    "⚡ Progressive mode", value=len(df) >= PROGRESSIVE_MIN_ROWS,
+                    help=f"Show results from a {data_processor.PROGRESSIVE_SAMPLE_ROWS:,}-row sample first, then refine"
+                )
+            if progressive:
+                with prog_col2:
+                    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+                    stratify_col = st.selectbox(
+                        "Stratify sample by", [None] + categorical_cols,
+                        format_func=lambda c: "(uniform sample)" if c is None else c,
+                        help="Sample every group at the same rate so group proportions are preserved"
+                    )
+                sample = data_processor.get_sample(df, stratify_col=stratify_col, cache_key=dataset_key)
+            
+            # Show data preview (one page of rows and columns at a time)
             st.subheader("🔍 Data Preview")
-            st.dataframe(df.head(10), use_container_width=True)
+            col_page = render_column_pager(df, "preview")
+            row_col1, row_col2 = st.columns(2)
+            with row_col1:
+                rows_per_page = st.selectbox("Rows per page", PREVIEW_ROW_PAGE_SIZES, key="preview_rows_per_page")
+            with row_col2:
+                row_pages = max(1, -(-len(df) // rows_per_page))
+                row_page = st.number_input(
+                    f"Row page (1-{row_pages})", min_value=1, max_value=row_pages, value=1, key="preview_row_page"
+                ) - 1
+            st.dataframe(
+                data_processor.get_preview_page(df, row_page, rows_per_page, col_page, COLUMN_PAGE_SIZE),
+                use_container_width=True
+            )
             
-            # Data summary
+            # Data summary for the visible columns
+            page_cols = df.columns[col_page * COLUMN_PAGE_SIZE:(col_page + 1) * COLUMN_PAGE_SIZE]
             st.subheader("📈 Data Summary")
             col1, col2 = st.columns(2)
             
             with col1:
                 st.write("**Data Types:**")
-                st.dataframe(df.dtypes.reset_index().rename(columns={0: 'Type', 'index': 'Column'}))
+                st.dataframe(df.dtypes[page_cols].reset_index().rename(columns={0: 'Type', 'index': 'Column'}))
             
             with col2:
                 # Basic statistics for numeric columns
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
-                if len(numeric_cols) > 0:
+                page_numeric_cols = df[page_cols].select_dtypes(include=[np.number]).columns
+                if len(page_numeric_cols) > 0:
                     st.write("**Numeric Statistics:**")
-                    st.dataframe(df[numeric_cols].describe())
+                    render_progressive(
+                        (dataset_key, 'describe', tuple(page_numeric_cols)),
+                        lambda data: data[page_numeric_cols].describe(), df, sample, st.dataframe
+                    )
             
             # Tabs for different analysis types
             tab1, tab2, tab3, tab4 = st.tabs(["🎯 Quick Analysis", "📊 Visualizations", "🤖 AI Insights", "📤 Export"])
@@ -114,28 +408,63 @@ def main():
             with tab1:
                 st.subheader("🎯 Quick Data Analysis")
                 
-                # Missing values
-                missing_data = df.isnull().sum()
-                if missing_data.sum() > 0:
-                    st.write("**Missing Values:**")
-                    missing_df = missing_data[missing_data > 0].reset_index()
-                    missing_df.columns = ['Column', 'Missing Count']
-                    st.dataframe(missing_df)
+                # Missing values (merged incrementally for appended CSV uploads)
+                def render_missing(missing_data):
+                    if missing_data.sum() > 0:
+                        st.write("**Missing Values:**")
+                        missing_df = missing_data[missing_data > 0].reset_index()
+                        missing_df.columns = ['Column', 'Missing Count']
+                        st.dataframe(missing_df)
+                    else:
+                        st.success("✅ No missing values found!")
+                
+                if incremental_summary:
+                    render_missing(pd.Series(
+                        {col: stats['missing'] for col, stats in incremental_summary['columns'].items()}
+                    ))
                 else:
-                    st.success("✅ No missing values found!")
+                    # Missing rate scaled to the full row count, so sample estimates read as counts
+                    render_progressive(
+                        (dataset_key, 'missing'), lambda data: data.isnull().mean(), df, sample,
+                        lambda rates: render_missing((rates * len(df)).round().astype(int))
+                    )
                 
-                # Column information
+                # Column information, computed only for the visible page
                 st.write("**Column Details:**")
-                col_info = []
-                for col in df.columns:
-                    col_info.append({
-                        'Column': col,
-                        'Type': str(df[col].dtype),
-                        'Non-Null Count': df[col].count(),
-                        'Unique Values': df[col].nunique()
-                    })
-                st.dataframe(pd.DataFrame(col_info))
-            
+                details_page = render_column_pager(df, "details")
+                details_cols = list(df.columns[details_page * COLUMN_PAGE_SIZE:(details_page + 1) * COLUMN_PAGE_SIZE])
+                render_progressive(
+                    (dataset_key, 'details', tuple(details_cols)),
+                    # Only exact results go into the per-dataset details cache
+                    lambda data: data_processor.get_column_details(
+                        data, details_cols, cache_key=dataset_key if data is df else None
+                    ),
+                    df, sample, st.dataframe
+                )
+
+                # Duplicates and keys: one hashing pass over every column, reused across reruns
+                if st.checkbox("🔑 Find duplicate rows and candidate keys", key="profile_keys"):
+                    with st.spinner("Hashing rows..."):
+                        keys = data_processor.profile_keys(
+                            df, cache_key=dataset_key,
+                            file_name=incremental_file
+                        )
+                    if keys['duplicate_rows']:
+                        st.warning(f"⚠️ {keys['duplicate_rows']:,} duplicate rows ({keys['duplicate_rows'] / max(keys['rows'], 1):.1%})")
+                    else:
+                        st.success("✅ No duplicate rows")
+                    def listed(items):
+                        more = len(items) - MAX_LISTED_KEYS
+                        return ", ".join(items[:MAX_LISTED_KEYS]) + (f" … and {more} more" if more > 0 else "")
+                    if keys['candidate_keys']:
+                        st.write("**Candidate keys:** " + listed([" + ".join(key) for key in keys['candidate_keys']]))
+                    else:
+                        st.info("No single column or column pair uniquely identifies rows")
+                    if keys['near_unique_columns']:
+                        st.write("**Near-unique columns:** " + listed([
+                            f"{col} ({ratio:.2%} distinct)" for col, ratio in keys['near_unique_columns'].items()
+                        ]))
+
             with tab2:
                 st.subheader("📊 Interactive Visualizations")
                 
@@ -158,10 +487,33 @@ def main():
                     with col2:
                         y_col = st.selectbox("Y-axis", numeric_cols)
                     
+                    # Line charts over dates are resampled; let the user pick the bucket size
+                    resolution = None
+                    if selected_chart == "line_chart" and pd.api.types.is_datetime64_any_dtype(df[x_col]):
+                        # Only bucket sizes whose point count over this column's span fits the budget
+                        resolution = st.selectbox(
+                            "Time resolution", ["auto"] + get_viz_generator().time_resolution_options(df, x_col),
+                            help="'auto' picks the finest resolution that fits the point budget"
+                        )
+                        resolution = None if resolution == "auto" else resolution
+                    
+                    # The requested chart stays on screen across reruns (progressive refinement reruns the app)
+                    chart_request = (dataset_key, selected_chart, x_col, y_col, resolution)
                     if st.button("Generate Chart"):
+                        st.session_state.chart_request = chart_request
+                    if st.session_state.get("chart_request") == chart_request:
                         try:
-                            fig = viz_generator.create_scatter_line(df, x_col, y_col, chart_type=selected_chart.replace('_', ' '))
-                            st.plotly_chart(fig, use_container_width=True)
+                            viz_generator = get_viz_generator()
+                            # Resampled time series already aggregate every row, so they are never sampled
+                            time_series = selected_chart == "line_chart" and pd.api.types.is_datetime64_any_dtype(df[x_col])
+                            render_progressive(
+                                (dataset_key, 'chart') + chart_request[1:],
+                                lambda data: viz_generator.create_scatter_line(
+                                    data, x_col, y_col, chart_type=selected_chart.replace('_', ' '), resolution=resolution
+                                ),
+                                df, df if time_series else sample,
+                                lambda fig: st.plotly_chart(fig, use_container_width=True)
+                            )
                         except Exception as e:
                             st.error(f"Error creating chart: {str(e)}")
                 
@@ -169,7 +521,7 @@ def main():
                     selected_col = st.selectbox("Select Column", numeric_cols)
                     if st.button("Generate Histogram"):
                         try:
-                            fig = viz_generator.create_chart(df, "histogram", [selected_col])
+                            fig = get_viz_generator().create_chart(df, "histogram", [selected_col])
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Error creating histogram: {str(e)}")
@@ -178,7 +530,7 @@ def main():
                     if len(numeric_cols) >= 2:
                         if st.button("Generate Correlation Matrix"):
                             try:
-                                fig = viz_generator.create_correlation_matrix(df[numeric_cols])
+                                fig = get_viz_generator().create_correlation_matrix(df, numeric_cols)
                                 st.plotly_chart(fig, use_container_width=True)
                             except Exception as e:
                                 st.error(f"Error creating correlation matrix: {str(e)}")
@@ -188,6 +540,8 @@ def main():
             with tab3:
                 st.subheader("🤖 AI-Powered Insights")
                 
+                # Only the analyzer class is loaded here; the SDK client is created on the first request
+                ai_analyzer = get_ai_analyzer()
                 if ai_analyzer:
                     # Analysis type selection
                     analysis_types = [
@@ -199,11 +553,15 @@ def main():
                     ]
                     
                     selected_analysis = st.selectbox("Select Analysis Type", analysis_types)
+                    ai_columns = st.multiselect(
+                        "Columns to analyze (all if empty)", all_cols, key="ai_columns",
+                        help="Only these columns are summarized and sent to the model"
+                    ) or None
                     
                     if st.button("🚀 Run AI Analysis"):
                         try:
                             with st.spinner("🧠 AI is analyzing your data..."):
-                                results = ai_analyzer.analyze_data(df, selected_analysis)
+                                results = ai_analyzer.analyze_data(df, selected_analysis, columns=ai_columns)
                             
                             st.success("✅ Analysis complete!")
                             
@@ -229,21 +587,53 @@ def main():
                     # Natural language questions
                     st.subheader("💬 Ask Questions About Your Data")
                     user_question = st.text_input("Ask a question about your data:")
+                    answer_mode = st.radio(
+                        "Answer from", ["Exact query on all rows", "Data sample (50 rows)"], horizontal=True,
+                        help="Exact: the AI writes a filter/group/aggregate query that runs locally on the full dataset"
+                    )
                     
                     if user_question and st.button("🔍 Get Answer"):
                         try:
                             with st.spinner("🤔 AI is thinking..."):
-                                answer = ai_analyzer.answer_question(df, user_question)
+                                if answer_mode.startswith("Exact"):
+                                    answer = ai_analyzer.answer_with_query(df, user_question, columns=ai_columns)
+                                else:
+                                    answer = ai_analyzer.answer_question(df, user_question, columns=ai_columns)
                             
                             st.success("✅ Answer ready!")
                             st.write("**Answer:**")
-                            st.write(answer.get("answer", "No answer generated"))
+                            st.write(answer.get("response", answer.get("answer", "No answer generated")))
                             
-                            if "visualization_suggestion" in answer:
-                                st.info(f"💡 Visualization suggestion: {answer['visualization_suggestion']}")
+                            if "result" in answer:
+                                with st.expander(f"🧮 Query result ({answer['matched_rows']:,} matching rows)"):
+                                    st.json(answer["query"])
+                                    st.dataframe(answer["result"], use_container_width=True)
+                            
+                            if answer.get("suggested_chart"):
+                                st.info(f"💡 Visualization suggestion: {answer['suggested_chart']}")
                             
                         except Exception as e:
                             st.error(f"Failed to answer question: {str(e)}")
+                    
+                    # Checklist review: many questions, one shared (cached) dataset context
+                    with st.expander("📋 Batch questions"):
+                        batch_text = st.text_area("One question per line", key="batch_questions")
+                        if st.button("🚀 Answer all"):
+                            questions = [q for q in batch_text.splitlines() if q.strip()]
+                            try:
+                                with st.spinner(f"🤔 Answering {len(questions)} questions..."):
+                                    batch_start = time.perf_counter()
+                                    answers = ai_analyzer.answer_questions(df, questions, columns=ai_columns)
+                                    batch_time = time.perf_counter() - batch_start
+                                
+                                st.success(f"✅ {len(answers)} answers in {batch_time:.1f}s")
+                                st.dataframe(pd.DataFrame([{
+                                    'Question': a['question'],
+                                    'Answer': a.get('response', a.get('error', '')),
+                                    'Latency (s)': a['latency_s']
+                                } for a in answers]), use_container_width=True)
+                            except Exception as e:
+                                st.error(f"Batch questions failed: {str(e)}")
                 else:
                     st.warning("🔑 AI features require API keys")
                     st.info("Set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variables to enable AI analysis")
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional
+
+# Per-process memory budget for loaded datasets (override with VOID_MEMORY_BUDGET_MB);
+# defaults to half of physical memory
+DEFAULT_BUDGET_FRACTION = 0.5
+FALLBACK_BUDGET_MB = 2048
+
+# Loading and cleaning briefly hold about two copies of a frame (for compact loads:
+# the chunks plus their concatenation, then that plus the categorized result)
+LOAD_PEAK_FACTOR = 2.0
+
+# Bytes read from the start of a CSV file to estimate its in-memory size
+ESTIMATE_SAMPLE_BYTES = 1024 * 1024
+
+# JSON cannot be sampled by prefix: assumed in-memory size per byte of file
+JSON_EXPANSION_FACTOR = 3.0
+
+# Rows kept by the sampled (out-of-core) load mode, and rows per streamed chunk
+ADMISSION_SAMPLE_ROWS = 200_000
+CHUNK_ROWS = 100_000
+
+# String columns with at most this share of distinct values become categoricals when compacting
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_budget_bytes() -> int:
+    """Configured memory budget of this process in bytes"""
+    configured = os.environ.get('VOID_MEMORY_BUDGET_MB')
+    if configured:
+        return int(float(configured) * 1024 * 1024)
+    try:
+        physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        return int(physical * DEFAULT_BUDGET_FRACTION)
+    except (ValueError, OSError, AttributeError):
+        return FALLBACK_BUDGET_MB * 1024 * 1024
+
+
+def memory_in_use_bytes() -> int:
+    """Resident memory of this process (all sessions' datasets included)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Not Linux: peak resident size is the best portable figure
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """In-memory size of a DataFrame, strings included"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def compact_frame(df: pd.DataFrame, category_max_ratio: Optional[float] = CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """Downcast numeric columns and turn low-cardinality string columns into categoricals
+
+    Floats are only narrowed to float32 when no value changes; category_max_ratio=None
+    leaves string columns alone.
+    """
+    compacted = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            compacted[col] = series
+        elif pd.api.types.is_integer_dtype(series):
+            compacted[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            narrow = series.astype('float32')
+            lossless = ((narrow.astype(series.dtype) == series) | series.isna()).all()
+            compacted[col] = narrow if lossless else series
+        elif category_max_ratio is not None and (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            distinct = series.nunique(dropna=True)
+            compacted[col] = series.astype('category') if distinct <= category_max_ratio * max(len(series), 1) else series
+        else:
+            compacted[col] = series
+    return pd.DataFrame(compacted, index=df.index)
+
+
+def reservoir_sample(chunks: Iterable[pd.DataFrame], n: int, seed: int = 0) -> pd.DataFrame:
+    """Uniform sample of n rows from a stream of chunks, holding at most n + one chunk rows
+
+    Every row gets a random key and the n smallest keys are kept (equivalent to
+    reservoir sampling, vectorized per chunk). Rows keep their stream order.
+    """
+    rng = np.random.default_rng(seed)
+    kept: Optional[pd.DataFrame] = None
+    kept_keys = np.empty(0)
+    offset = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        chunk.index = chunk.index + offset
+        offset += len(chunk)
+        keys = np.concatenate([kept_keys, rng.random(len(chunk))])
+        combined = chunk if kept is None else pd.concat([kept, chunk])
+        if len(combined) > n:
+            selected = np.sort(np.argpartition(keys, n - 1)[:n])
+            combined, keys = combined.iloc[selected], keys[selected]
+        kept, kept_keys = combined, keys
+    if kept is None:
+        return pd.DataFrame()
+    return kept.reset_index(drop=True)
+
+
+def estimate_footprint(sample: pd.DataFrame, sample_rows_total: float) -> Dict[str, int]:
+    """Extrapolate full and compacted in-memory sizes from a parsed sample and the estimated row count"""
+    if len(sample) == 0:
+        return {'rows': 0, 'full_bytes': 0, 'compact_bytes': 0, 'compact_load_bytes': 0}
+    per_row = frame_bytes(sample) / len(sample)
+    per_row_compact = frame_bytes(compact_frame(sample)) / len(sample)
+    # Compact loads hold chunks with downcast numbers but uncategorized strings until the final pass
+    per_row_compact_load = frame_bytes(compact_frame(sample, category_max_ratio=None)) / len(sample)
+    return {
+        'rows': int(sample_rows_total),
+        'full_bytes': int(per_row * sample_rows_total),
+        'compact_bytes': int(per_row_compact * sample_rows_total),
+        'compact_load_bytes': int(per_row_compact_load * sample_rows_total),
+        'sample_bytes': int(per_row * min(sample_rows_total, ADMISSION_SAMPLE_ROWS))
+    }
+
+
+def choose_load_mode(estimate: Dict[str, int], budget: int, in_use: int, streamable: bool) -> Dict[str, Any]:
+    """Pick full, compact, sample or refuse so that the load stays inside the remaining budget"""
+    available = budget - in_use
+    if estimate['full_bytes'] * LOAD_PEAK_FACTOR <= available:
+        mode, reason = 'full', "fits in memory"
+    elif streamable and estimate.get('compact_load_bytes', estimate['full_bytes']) * LOAD_PEAK_FACTOR <= available:
+        mode, reason = 'compact', "too large as is; loading with compact column types"
+    elif streamable and estimate.get('sample_bytes', 0) * LOAD_PEAK_FACTOR <= available:
+        mode, reason = 'sample', f"too large even compacted; loading a uniform sample of {ADMISSION_SAMPLE_ROWS:,} rows"
+    else:
+        mode = 'refuse'
+        reason = (f"needs about {estimate['full_bytes'] * LOAD_PEAK_FACTOR / 1024 ** 2:,.0f} MB "
+                  f"but only {max(available, 0) / 1024 ** 2:,.0f} MB of the {budget / 1024 ** 2:,.0f} MB budget is free")
+    return {'mode': mode, 'reason': reason, 'budget_bytes': budget, 'in_use_bytes': in_use, 'available_bytes': available}
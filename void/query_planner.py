@@ -0,0 +1,245 @@
+import json
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from instrumentation import traced
+
+# Filter operators a planned query may use
+FILTER_OPERATORS = ['==', '!=', '>', '>=', '<', '<=', 'in', 'not in', 'contains', 'isnull', 'notnull']
+
+# Aggregations a planned query may use ('count' also accepts '*' as column)
+AGGREGATIONS = ['count', 'sum', 'mean', 'median', 'min', 'max', 'nunique', 'std']
+
+# Aggregations that only make sense on numbers (bools count as 0/1); mean and median also take datetimes
+NUMERIC_AGGREGATIONS = ['sum', 'mean', 'median', 'std']
+DATETIME_AGGREGATIONS = ['mean', 'median']
+
+# Filter operators that order values
+ORDERING_OPERATORS = ['>', '>=', '<', '<=']
+
+# Result rows sent back to the model for narration
+MAX_RESULT_ROWS = 50
+
+# Example values listed per column in the schema prompt
+SCHEMA_EXAMPLE_VALUES = 3
+
+QUERY_FORMAT = """{
+    "filters": [{"column": "name", "op": "one of == != > >= < <= in, not in, contains, isnull, notnull", "value": "..."}],
+    "group_by": ["column", ...],
+    "aggregations": [{"column": "name or * for row count", "func": "one of count sum mean median min max nunique std", "alias": "optional output name"}],
+    "columns": ["columns to list when there are no aggregations"],
+    "sort_by": {"column": "output column", "descending": true},
+    "limit": 20
+}"""
+
+
+def describe_schema(df: pd.DataFrame, max_columns: int = 200) -> str:
+    """Compact schema for query planning: name, dtype and a few example values per column"""
+    head = df.head(1000)
+    lines = [f"{len(df)} rows, {len(df.columns)} columns"]
+    for col in df.columns[:max_columns]:
+        examples = head[col].dropna().drop_duplicates().head(SCHEMA_EXAMPLE_VALUES).tolist()
+        lines.append(f"- {col} ({df[col].dtype}): e.g. {', '.join(str(v)[:40] for v in examples)}")
+    if len(df.columns) > max_columns:
+        lines.append(f"... {len(df.columns) - max_columns} more columns")
+    return '\n'.join(lines)
+
+
+def parse_query(text: str) -> Dict[str, Any]:
+    """Extract the JSON query object from a model response (code fences allowed)"""
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        raise ValueError("Response contains no JSON query")
+    query = json.loads(match.group(0))
+    if not isinstance(query, dict):
+        raise ValueError("Query must be a JSON object")
+    return query
+
+
+def validate_query(query: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
+    """Check a planned query against the dataset and return it with defaults filled in"""
+    if not isinstance(query, dict):
+        raise ValueError(f"Query must be a JSON object, not {type(query).__name__}")
+    columns = set(df.columns)
+
+    def check_column(col, where):
+        if col not in columns:
+            raise ValueError(f"Unknown column in {where}: {col}")
+
+    filters = _check_list(query, 'filters', dict)
+    for f in filters:
+        check_column(f.get('column'), 'filters')
+        if f.get('op') not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {f.get('op')}")
+        _check_filter_value(df[f['column']], f)
+
+    group_by = _check_list(query, 'group_by', str)
+    for col in group_by:
+        check_column(col, 'group_by')
+
+    aggregations = _check_list(query, 'aggregations', dict)
+    for agg in aggregations:
+        if agg.get('func') not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {agg.get('func')}")
+        if not (agg.get('func') == 'count' and agg.get('column') in (None, '*')):
+            check_column(agg.get('column'), 'aggregations')
+            _check_aggregation(df[agg['column']], agg)
+
+    selected = _check_list(query, 'columns', str)
+    for col in selected:
+        check_column(col, 'columns')
+
+    limit = query.get('limit')
+    if limit is None:
+        limit = MAX_RESULT_ROWS
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+        raise ValueError(f"Invalid limit: {limit}")
+
+    return {
+        'filters': filters,
+        'group_by': group_by,
+        'aggregations': aggregations,
+        'columns': selected,
+        'sort_by': query.get('sort_by'),
+        'limit': min(limit, MAX_RESULT_ROWS)
+    }
+
+
+def _check_list(query: Dict[str, Any], field: str, item_type: type) -> List[Any]:
+    """Return query[field] (empty when missing) after checking it is a list of item_type"""
+    items = query.get(field)
+    if items is None:
+        return []
+    if not isinstance(items, list) or not all(isinstance(item, item_type) for item in items):
+        expected = 'objects' if item_type is dict else 'strings'
+        raise ValueError(f"{field} must be a list of {expected}, got {json.dumps(items, default=str)}")
+    return items
+
+
+def _coerce_value(series: pd.Series, value: Any) -> Any:
+    """Convert a JSON filter value to the column's type (numbers, dates)"""
+    if isinstance(value, list):
+        return [_coerce_value(series, v) for v in value]
+    if isinstance(value, str):
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return pd.to_numeric(value)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return pd.Timestamp(value)
+    return value
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series)
+
+
+def _check_aggregation(series: pd.Series, agg: Dict[str, Any]) -> None:
+    """Reject numeric aggregations of columns they don't apply to (e.g. sum of strings concatenates them)"""
+    func = agg['func']
+    if func not in NUMERIC_AGGREGATIONS or _is_numeric(series):
+        return
+    if func in DATETIME_AGGREGATIONS and pd.api.types.is_datetime64_any_dtype(series):
+        return
+    raise ValueError(f"Aggregation {func} needs a numeric column, but {agg['column']} is {series.dtype}")
+
+
+def _check_filter_value(series: pd.Series, f: Dict[str, Any]) -> None:
+    """Make sure a filter value can be compared with the column's values"""
+    op = f['op']
+    if op in ('isnull', 'notnull'):
+        return
+    if 'value' not in f or f['value'] is None:
+        raise ValueError(f"Filter on {f['column']} with {op} needs a value")
+    if op == 'contains':
+        return
+    value = f['value']
+    if op in ('in', 'not in') and not isinstance(value, list):
+        value = [value]
+    if op not in ('in', 'not in') and isinstance(value, list):
+        raise ValueError(f"Filter {op} on {f['column']} takes a single value, not a list")
+    
+    try:
+        coerced = _coerce_value(series, value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Filter value {value!r} does not match column {f['column']} ({series.dtype}): {e}")
+    
+    # JSON true/false would compare as 1/0 with a numeric column
+    if (_is_numeric(series) and not pd.api.types.is_bool_dtype(series)
+            and any(isinstance(v, bool) for v in (coerced if isinstance(coerced, list) else [coerced]))):
+        raise ValueError(f"Cannot compare numeric column {f['column']} ({series.dtype}) with boolean {value!r}")
+    
+    if op in ORDERING_OPERATORS:
+        orderable = (
+            (_is_numeric(series) and isinstance(coerced, (int, float, np.number)) and not isinstance(coerced, bool))
+            or (pd.api.types.is_datetime64_any_dtype(series) and isinstance(coerced, pd.Timestamp))
+            or (not _is_numeric(series) and not pd.api.types.is_datetime64_any_dtype(series) and isinstance(coerced, str))
+        )
+        if not orderable:
+            raise ValueError(f"Cannot compare column {f['column']} ({series.dtype}) with {value!r} using {op}")
+
+
+def _filter_mask(df: pd.DataFrame, f: Dict[str, Any]) -> pd.Series:
+    series = df[f['column']]
+    op = f['op']
+    if op == 'isnull':
+        return series.isna()
+    if op == 'notnull':
+        return series.notna()
+    if op == 'contains':
+        return series.astype(str).str.contains(str(f.get('value')), case=False, regex=False, na=False)
+
+    value = _coerce_value(series, f.get('value'))
+    if op in ('in', 'not in'):
+        mask = series.isin(value if isinstance(value, list) else [value])
+        return ~mask if op == 'not in' else mask
+    return {
+        '==': series.eq, '!=': series.ne, '>': series.gt,
+        '>=': series.ge, '<': series.lt, '<=': series.le
+    }[op](value)
+
+
+@traced("query.execute")
+def execute_query(df: pd.DataFrame, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a validated query on the full DataFrame with vectorized pandas operations
+
+    Returns the result table (at most query['limit'] rows), the number of
+    matching rows and the number of result rows before the limit.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for f in query['filters']:
+        mask &= _filter_mask(df, f).to_numpy(dtype=bool, na_value=False)
+    matched = df[mask] if not mask.all() else df
+
+    if query['aggregations']:
+        named = {}
+        for agg in query['aggregations']:
+            column = agg.get('column')
+            if agg['func'] == 'count' and column in (None, '*'):
+                column = query['group_by'][0] if query['group_by'] else matched.columns[0]
+                func = 'size'
+            else:
+                func = agg['func']
+            alias = agg.get('alias') or (f"{agg['func']}_{column}" if func != 'size' else 'row_count')
+            named[alias] = (column, func)
+
+        if query['group_by']:
+            result = matched.groupby(query['group_by'], dropna=False, observed=True).agg(**named).reset_index()
+        else:
+            result = pd.DataFrame({
+                alias: [len(matched) if func == 'size' else matched[column].agg(func)]
+                for alias, (column, func) in named.items()
+            })
+    elif query['group_by']:
+        result = matched.groupby(query['group_by'], dropna=False, observed=True).size().reset_index(name='row_count')
+    else:
+        result = matched[query['columns']] if query['columns'] else matched
+
+    sort_by = query.get('sort_by')
+    if isinstance(sort_by, dict) and sort_by.get('column') in result.columns:
+        result = result.sort_values(sort_by['column'], ascending=not sort_by.get('descending', False))
+
+    return {
+        'table': result.head(query['limit']).reset_index(drop=True),
+        'matched_rows': len(matched),
+        'result_rows': len(result)
+    }
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate_index import AggregateIndex
+
+
+@pytest.mark.parametrize('bins', [7, 30, 50, 64, 2520])
+def test_histogram_counts_are_exact(bins):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'v': np.concatenate([rng.normal(size=100_000), [np.nan] * 5])})
+    hist = AggregateIndex(df).histogram('v', bins)
+
+    expected, _ = np.histogram(df['v'].dropna(), bins=hist['edges'])
+    assert len(hist['counts']) == bins
+    assert (hist['counts'] == expected).all()
@@ -0,0 +1,27 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from export_handler import ExportHandler
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_parquet_export_infers_types_from_all_chunks():
+    df = pd.DataFrame({
+        'a': np.arange(6),
+        'b': pd.Series(['x', 'y', 'z', 'u', 'v', 'w'], dtype=object),
+        'late': pd.Series([None, None, None, 'p', None, 'q'], dtype=object),
+    })
+    buffer = io.BytesIO()
+    ExportHandler().write_data_export(df, buffer, export_format='parquet', chunk_rows=2)
+
+    buffer.seek(0)
+    table = pq.read_table(buffer)
+    assert table.num_rows == 6
+    result = table.to_pandas()
+    assert result['b'].tolist() == df['b'].tolist()
+    assert result['late'].tolist()[3] == 'p'
+    assert result['late'].isna().sum() == 4
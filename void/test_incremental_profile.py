@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from incremental_profile import build_hash_profile, extend_hash_profile, summarize_keys
+
+
+class NamedBytesIO(io.BytesIO):
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+
+
+def load_and_profile(processor, content):
+    df = processor.load_file_incremental(NamedBytesIO(content, 'data.csv'))
+    return df, processor.profile_keys(df, file_name='data.csv')
+
+
+@pytest.mark.parametrize('base, appended', [
+    # v is float64 (NaN) in the base; the appended rows alone would parse as int64
+    (b"k,v,s\n1,,a\n2,5,b\n3,2,c\n", b"3,2,c\n"),
+    (b"k,v,s\n1,1.5,a\n2,5.0,b\n", b"3,2.5,c\n4,7.0,d\n"),
+    # The base column is int64 and becomes float64 once the append adds a NaN
+    (b"k,v,s\n1,1,a\n2,5,b\n", b"3,,c\n1,1,a\n"),
+])
+def test_incremental_key_profile_matches_fresh_profile(base, appended):
+    processor = DataProcessor()
+    load_and_profile(processor, base)
+    df, incremental = load_and_profile(processor, base + appended)
+
+    assert incremental == summarize_keys(build_hash_profile(df))
+
+
+@pytest.mark.parametrize('infer_string', [True, False])
+@pytest.mark.parametrize('base, appended', [
+    # Numbers, then text: the cached numeric type would turn every new value into NaN
+    (b"code\n10\n20\n30\n", b"x\ny\nz\nw\n"),
+    # Text, then numeric-looking rows: a fresh load keeps them as strings
+    (b"id,s\n1,A1\n2,A2\n3,A3\n", b"4,5\n5,6\n"),
+    (b"a,d\n1,2024-01-01\n2,2024-01-02\n", b"3,2024-01-03\n"),
+    (b"a,d\n1,2024-01-01\n2,2024-01-02\n", b"3,soon\n"),
+    (b"k,v\n1,\n2,5\n", b"3,2\n"),
+])
+def test_incremental_load_matches_fresh_load(infer_string, base, appended):
+    with pd.option_context('future.infer_string', infer_string):
+        processor = DataProcessor()
+        processor.load_file_incremental(NamedBytesIO(base, 'data.csv'))
+        incremental = processor.load_file_incremental(NamedBytesIO(base + appended, 'data.csv'))
+        fresh = DataProcessor().load_file(NamedBytesIO(base + appended, 'data.csv'))
+
+    pd.testing.assert_frame_equal(incremental, fresh)
+
+
+def test_extend_hash_profile_matches_build():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'id': np.arange(1000), 'group': rng.integers(0, 10, 1000), 'day': np.arange(1000) % 100})
+    df = pd.concat([df, df.iloc[:5]], ignore_index=True)
+
+    extended = extend_hash_profile(build_hash_profile(df.iloc[:800]), df.iloc[800:])
+    fresh = build_hash_profile(df)
+
+    assert summarize_keys(extended) == summarize_keys(fresh)
+    assert (extended['row_hashes'] == fresh['row_hashes']).all()
+
+
+def test_local_csv_falls_back_to_latin1(tmp_path):
+    (tmp_path / 'data.csv').write_bytes(("name,v\n" + "abc,1\n" * 300000 + "thé,2\n").encode('latin-1'))
+    df = DataProcessor().load_local_dataset(str(tmp_path), 'data.csv')
+
+    assert len(df) == 300001
+    assert df['name'].iloc[-1] == 'thé'
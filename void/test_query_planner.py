@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from query_planner import execute_query, validate_query
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'name': ['x', 'y', 'z', 'w'], 'amount': [1, 2, 3, 4]})
+
+
+@pytest.mark.parametrize('query', [
+    {'aggregations': [{'column': 'name', 'func': 'mean'}]},
+    {'aggregations': [{'column': 'name', 'func': 'sum'}]},
+    {'filters': [{'column': 'amount', 'op': '>', 'value': 'abc'}]},
+    {'filters': [{'column': 'name', 'op': '>', 'value': 3}]},
+    {'filters': [{'column': 'amount', 'op': '==', 'value': True}]},
+    {'filters': [{'column': 'amount', 'op': 'in', 'value': [1, False]}]},
+])
+def test_validate_query_rejects_type_mismatches(df, query):
+    with pytest.raises(ValueError):
+        validate_query(query, df)
+
+
+@pytest.mark.parametrize('query', [
+    ['amount'],
+    {'filters': {'column': 'amount', 'op': '>', 'value': 1}},
+    {'filters': ['amount > 1']},
+    {'aggregations': {'column': 'amount', 'func': 'sum'}},
+    {'aggregations': [['amount', 'sum']]},
+    {'group_by': 'name'},
+    {'group_by': [{'column': 'name'}]},
+    {'columns': 'amount'},
+    {'columns': [1]},
+    {'limit': True},
+    {'limit': '10'},
+    {'limit': 0},
+])
+def test_validate_query_rejects_malformed_structure(df, query):
+    with pytest.raises(ValueError):
+        validate_query(query, df)
+
+
+def test_filter_values_are_coerced_to_the_column_type(df):
+    query = validate_query({
+        'filters': [{'column': 'amount', 'op': '>=', 'value': '2'}],
+        'aggregations': [{'column': 'amount', 'func': 'sum'}, {'column': 'name', 'func': 'max'}]
+    }, df)
+    assert execute_query(df, query)['table'].to_dict('records') == [{'sum_amount': 9, 'max_name': 'z'}]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from visualization import VisualizationGenerator
+
+
+def make_frame(rows=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'x': rng.random(rows),
+        'y': rng.random(rows) * 10,
+        'group': rng.choice(['a', 'b', 'c'], rows),
+        'label': rng.choice(['p', 'q'], rows),
+    })
+
+
+def test_bar_chart_bins_continuous_x():
+    df = make_frame()
+    fig = VisualizationGenerator().create_bar_chart(df, 'x', 'y', max_groups=50)
+
+    assert len(fig.data[0].x) == 50
+    assert np.array(fig.data[0].customdata)[:, 2].sum() == len(df)
+    assert 'Other' not in str(fig.data[0].x)
+
+
+def test_bar_chart_rolls_up_datetime_x():
+    df = make_frame(5000)
+    df['when'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(len(df)), unit='h')
+    fig = VisualizationGenerator().create_bar_chart(df, 'when', 'group', max_groups=50)
+
+    assert len(fig.data[0].x) <= 50
+    assert sum(fig.data[0].y) == len(df)
+
+
+def test_binned_counts_match_histogram():
+    df = make_frame()
+    fig = VisualizationGenerator().create_bar_chart(df, 'x', 'group', max_groups=50)
+
+    lefts = np.array(fig.data[0].customdata)[:, 0]
+    edges = np.append(lefts, np.array(fig.data[0].customdata)[-1, 1])
+    expected, _ = np.histogram(df['x'], bins=edges)
+    assert (np.array(fig.data[0].y) == expected).all()
+
+
+def test_time_series_resolution_is_clamped_to_point_budget():
+    df = pd.DataFrame({'when': pd.date_range('2024-01-01', periods=100_000, freq='5min'), 'v': 1.0})
+    generator = VisualizationGenerator()
+    fig = generator.create_time_series(df, 'when', 'v', max_points=2000, resolution='minute')
+
+    assert len(fig.data[0].x) <= 2000
+    assert fig.layout.title.text.endswith('(per day)')
+    assert generator.time_resolution_options(df, 'when', max_points=2000) == ['day', 'week', 'month']
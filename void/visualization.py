@@ -1,17 +1,37 @@
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
+from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+import weakref
 from typing import Optional, Dict, Any, List
-import streamlit as st
+from instrumentation import traced
+from aggregate_index import AggregateIndex, choose_time_resolution, fitting_time_resolutions, top_n_with_other
+
+# Line charts over datetime columns are resampled above this many points
+DEFAULT_MAX_TIME_POINTS = 2000
+
+# Columns shown on hover in raw scatter plots when none are given (first N of the dataset)
+DEFAULT_HOVER_COLUMNS = 5
+
+
+def project_columns(df: pd.DataFrame, columns: List[Optional[str]]) -> pd.DataFrame:
+    """Return only the given columns (duplicates and None dropped), or df itself if that is all of them"""
+    selected = list(dict.fromkeys(c for c in columns if c is not None))
+    if len(selected) == len(df.columns) and selected == df.columns.tolist():
+        return df
+    return df[selected]
 
 class VisualizationGenerator:
     """Generate interactive visualizations using Plotly"""
     
     def __init__(self):
         self.color_palette = px.colors.qualitative.Set3
+        # id(dataset) -> AggregateIndex, removed when the dataset is garbage collected
+        self._aggregate_indexes: Dict[int, AggregateIndex] = {}
     
+    @traced("viz.create_chart")
     def create_chart(self, df: pd.DataFrame, chart_type: str, columns: List[str]) -> go.Figure:
         """Create chart based on type and columns"""
         chart_type = chart_type.lower().replace(' ', '_')
@@ -34,22 +54,38 @@ class VisualizationGenerator:
             # Default to scatter plot
             return self.create_scatter_plot(df, columns)
     
+    @traced("viz.create_scatter_line")
     def create_scatter_line(self, df: pd.DataFrame, x_col: str, y_col: str, 
-                           color_col: Optional[str] = None, chart_type: str = "scatter") -> go.Figure:
-        """Create scatter plot or line chart"""
+                           color_col: Optional[str] = None, chart_type: str = "scatter",
+                           max_points: int = DEFAULT_MAX_TIME_POINTS, resolution: Optional[str] = None,
+                           hover_cols: Optional[List[str]] = None) -> go.Figure:
+        """Create scatter plot or line chart
+        
+        Line charts over a datetime x-axis with more rows than max_points (or an
+        explicit resolution label such as 'hour') are resampled into time buckets.
+        Only the plotted and hover columns are copied into the figure.
+        """
         try:
+            if (chart_type != "scatter plot" and color_col is None
+                    and pd.api.types.is_datetime64_any_dtype(df[x_col])
+                    and pd.api.types.is_numeric_dtype(df[y_col])
+                    and (resolution is not None or len(df) > max_points)):
+                return self.create_time_series(df, x_col, y_col, max_points, resolution)
+            
             if chart_type == "scatter plot":
+                if hover_cols is None:
+                    hover_cols = df.columns.tolist()[:DEFAULT_HOVER_COLUMNS]  # Show first 5 columns on hover
                 fig = px.scatter(
-                    df, 
+                    project_columns(df, [x_col, y_col, color_col] + list(hover_cols)), 
                     x=x_col, 
                     y=y_col, 
                     color=color_col,
                     title=f"{y_col} vs {x_col}",
-                    hover_data=df.columns.tolist()[:5]  # Show first 5 columns on hover
+                    hover_data=list(hover_cols)
                 )
             else:  # line chart
                 fig = px.line(
-                    df, 
+                    project_columns(df, [x_col, y_col, color_col]), 
                     x=x_col, 
                     y=y_col, 
                     color=color_col,
@@ -68,6 +104,62 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating {chart_type}: {str(e)}")
     
+    def time_resolution_options(self, df: pd.DataFrame, x_col: str,
+                                max_points: int = DEFAULT_MAX_TIME_POINTS) -> List[str]:
+        """Labels of the resolutions a time series over x_col can be drawn at within max_points"""
+        times = df[x_col].dropna()
+        if times.empty:
+            return []
+        return [label for _, label in fitting_time_resolutions(times.min(), times.max(), max_points)]
+    
+    @traced("viz.create_time_series")
+    def create_time_series(self, df: pd.DataFrame, x_col: str, y_col: str,
+                           max_points: int = DEFAULT_MAX_TIME_POINTS, resolution: Optional[str] = None) -> go.Figure:
+        """Create a resampled line chart (bucket mean with a min-max band) over a datetime column"""
+        try:
+            times = df[x_col].dropna()
+            if times.empty:
+                raise Exception(f"No datetime values in {x_col}")
+            
+            # A resolution too fine for max_points is clamped to the finest one that fits
+            fitting = fitting_time_resolutions(times.min(), times.max(), max_points)
+            labels = {label: freq for freq, label in fitting}
+            if resolution in labels:
+                freq, label = labels[resolution], resolution
+            else:
+                freq, label = fitting[0]
+            
+            rollup = self.get_aggregate_index(df).time_rollup(x_col, y_col, freq)
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=rollup.index, y=rollup['max'], mode='lines', line=dict(width=0),
+                name='max', showlegend=False, hoverinfo='skip'
+            ))
+            fig.add_trace(go.Scatter(
+                x=rollup.index, y=rollup['min'], mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor='rgba(99, 110, 250, 0.2)', name='min–max'
+            ))
+            fig.add_trace(go.Scatter(
+                x=rollup.index, y=rollup['mean'], mode='lines', name='mean',
+                customdata=np.column_stack([rollup['min'], rollup['max'], rollup['count']]),
+                hovertemplate="%{x}<br>mean: %{y:.4g}<br>min: %{customdata[0]:.4g}<br>"
+                              "max: %{customdata[1]:.4g}<br>rows: %{customdata[2]}<extra></extra>"
+            ))
+            
+            fig.update_layout(
+                title=f"{y_col} over {x_col} (per {label})",
+                height=500,
+                xaxis_title=x_col,
+                yaxis_title=y_col,
+                hovermode='x unified'
+            )
+            
+            return fig
+            
+        except Exception as e:
+            raise Exception(f"Error creating time series: {str(e)}")
+    
     def create_scatter_plot(self, df: pd.DataFrame, columns: List[str]) -> go.Figure:
         """Create scatter plot from column list"""
         if len(columns) < 2:
@@ -97,25 +189,53 @@ class VisualizationGenerator:
         
         return self.create_scatter_line(df, x_col, y_col, color_col, "line chart")
     
-    def create_bar_chart(self, df: pd.DataFrame, x_col: str, y_col: str) -> go.Figure:
-        """Create bar chart"""
+    def get_aggregate_index(self, df: pd.DataFrame) -> AggregateIndex:
+        """Return the aggregate index of a dataset, creating it on first use"""
+        key = id(df)
+        index = self._aggregate_indexes.get(key)
+        if index is None:
+            index = AggregateIndex(df)
+            self._aggregate_indexes[key] = index
+            # Drop the index together with its dataset
+            weakref.finalize(df, self._aggregate_indexes.pop, key, None)
+        return index
+    
+    @traced("viz.create_bar_chart")
+    def create_bar_chart(self, df: pd.DataFrame, x_col: str, y_col: str, max_groups: int = 50) -> go.Figure:
+        """Create bar chart from per-group summaries (top groups plus an "Other" bucket)
+        
+        A numeric x with more than max_groups distinct values is binned instead, and
+        a datetime x is rolled up into time buckets that fit max_groups.
+        """
         try:
-            # If x_col is categorical, group by it
-            if df[x_col].dtype == 'object' or df[x_col].dtype.name == 'category':
-                # Group by category and aggregate
-                if df[y_col].dtype in ['int64', 'float64']:
-                    grouped_df = df.groupby(x_col)[y_col].mean().reset_index()
-                else:
-                    grouped_df = df.groupby(x_col).size().reset_index(name='count')
-                    y_col = 'count'
+            index = self.get_aggregate_index(df)
+            numeric_y = pd.api.types.is_numeric_dtype(df[y_col]) and not pd.api.types.is_bool_dtype(df[y_col])
+            if pd.api.types.is_datetime64_any_dtype(df[x_col]) and index.distinct_count(x_col) > max_groups:
+                return self._create_time_bar_chart(index, df[x_col], y_col if numeric_y else None, max_groups)
+            if (pd.api.types.is_numeric_dtype(df[x_col]) and not pd.api.types.is_bool_dtype(df[x_col])
+                    and index.distinct_count(x_col) > max_groups):
+                return self._create_binned_bar_chart(index, x_col, y_col if numeric_y else None, max_groups)
+            
+            if numeric_y:
+                summary = index.summary(x_col, y_col)
+                value_col = 'mean'
+                y_label = f"{y_col} (mean)"
             else:
-                grouped_df = df
+                summary = index.summary(x_col)
+                value_col = 'count'
+                y_label = 'count'
+            
+            summary, merged = top_n_with_other(summary, max_groups)
+            if merged:
+                # Mixed labels: use a categorical axis
+                summary.index = summary.index.map(str)
             
+            grouped_df = pd.DataFrame({x_col: summary.index, y_label: summary[value_col].to_numpy()})
             fig = px.bar(
                 grouped_df,
                 x=x_col,
-                y=y_col,
-                title=f"{y_col} by {x_col}"
+                y=y_label,
+                title=f"{y_label} by {x_col}"
             )
             
             fig.update_layout(
@@ -128,6 +248,49 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating bar chart: {str(e)}")
     
+    def _create_time_bar_chart(self, index: AggregateIndex, times: pd.Series, y_col: Optional[str],
+                               max_groups: int) -> go.Figure:
+        """Bar chart of y's mean (or the row count) per time bucket of a datetime x"""
+        freq, label = choose_time_resolution(times.min(), times.max(), max_groups)
+        rollup = index.time_rollup(times.name, y_col, freq)
+        value_col, y_label = ('mean', f"{y_col} (mean)") if y_col is not None else ('count', 'count')
+        
+        fig = go.Figure(go.Bar(
+            x=rollup.index,
+            y=rollup[value_col],
+            customdata=rollup['count'],
+            hovertemplate="%{x}<br>" + y_label + ": %{y}<br>rows: %{customdata}<extra></extra>"
+        ))
+        fig.update_layout(
+            title=f"{y_label} by {times.name} (per {label})",
+            xaxis_title=times.name,
+            yaxis_title=y_label,
+            height=500
+        )
+        return fig
+    
+    def _create_binned_bar_chart(self, index: AggregateIndex, x_col: str, y_col: Optional[str], bins: int) -> go.Figure:
+        """Bar chart of y's mean (or the row count) over equal-width bins of a continuous x"""
+        binned = index.binned_summary(x_col, y_col, bins)
+        value_col, y_label = ('mean', f"{y_col} (mean)") if y_col is not None else ('count', 'count')
+        
+        fig = go.Figure(go.Bar(
+            x=(binned['left'] + binned['right']) / 2,
+            y=binned[value_col],
+            width=binned['right'] - binned['left'],
+            customdata=np.column_stack([binned['left'], binned['right'], binned['count']]),
+            hovertemplate="%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>" + y_label
+                          + ": %{y}<br>rows: %{customdata[2]}<extra></extra>"
+        ))
+        fig.update_layout(
+            title=f"{y_label} by {x_col} (binned)",
+            xaxis_title=x_col,
+            yaxis_title=y_label,
+            height=500,
+            bargap=0.05
+        )
+        return fig
+    
     def create_bar_chart_from_columns(self, df: pd.DataFrame, columns: List[str]) -> go.Figure:
         """Create bar chart from column list"""
         if len(columns) < 2:
@@ -142,20 +305,43 @@ class VisualizationGenerator:
         
         return self.create_bar_chart(df, columns[0], columns[1])
     
+    @traced("viz.create_histogram")
     def create_histogram(self, df: pd.DataFrame, column: str, bins: int = 30) -> go.Figure:
-        """Create histogram"""
+        """Create histogram from server-side bins with a box plot summary on top"""
         try:
-            fig = px.histogram(
-                df,
-                x=column,
-                nbins=bins,
-                title=f"Distribution of {column}",
-                marginal="box"  # Add box plot on top
-            )
-            
+            if not pd.api.types.is_numeric_dtype(df[column]) or pd.api.types.is_bool_dtype(df[column]):
+                # Non-numeric columns are binned by Plotly
+                fig = px.histogram(df[[column]], x=column, nbins=bins, title=f"Distribution of {column}")
+                fig.update_layout(height=500, showlegend=False)
+                return fig
+            
+            hist = self.get_aggregate_index(df).histogram(column, bins)
+            edges, counts, box = hist['edges'], hist['counts'], hist['box']
+            
+            fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+            if box is not None:
+                fig.add_trace(go.Box(
+                    q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+                    lowerfence=[box['lowerfence']], upperfence=[box['upperfence']], mean=[box['mean']],
+                    y=[column], orientation='h', boxpoints=False, name=column
+                ), row=1, col=1)
+            fig.add_trace(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                name=column,
+                customdata=np.column_stack([edges[:-1], edges[1:]]),
+                hovertemplate="%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>count: %{y}<extra></extra>"
+            ), row=2, col=1)
+            
+            fig.update_yaxes(showticklabels=False, row=1, col=1)
+            fig.update_xaxes(title_text=column, row=2, col=1)
+            fig.update_yaxes(title_text="count", row=2, col=1)
             fig.update_layout(
+                title=f"Distribution of {column}",
                 height=500,
-                showlegend=False
+                showlegend=False,
+                bargap=0
             )
             
             return fig
@@ -163,32 +349,60 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating histogram: {str(e)}")
     
-    def create_box_plot(self, df: pd.DataFrame, columns: List[str]) -> go.Figure:
-        """Create box plot"""
+    @traced("viz.create_box_plot")
+    def create_box_plot(self, df: pd.DataFrame, columns: List[str], max_groups: int = 50) -> go.Figure:
+        """Create box plot from precomputed quartiles and whiskers"""
         try:
+            value_col = columns[0] if len(columns) == 1 else columns[1]
+            if not pd.api.types.is_numeric_dtype(df[value_col]) or pd.api.types.is_bool_dtype(df[value_col]):
+                raise Exception(f"Column {value_col} is not numeric")
+            
+            index = self.get_aggregate_index(df)
             if len(columns) == 1:
                 # Single variable box plot
-                fig = px.box(df, y=columns[0], title=f"Box Plot of {columns[0]}")
+                summary = index.summary(None, value_col)
+                title = f"Box Plot of {value_col}"
+                names = [value_col]
             else:
-                # Box plot by category
-                fig = px.box(
-                    df, 
-                    x=columns[0], 
-                    y=columns[1], 
-                    title=f"{columns[1]} by {columns[0]}"
-                )
+                # Box plot by category, largest groups only
+                summary = index.summary(columns[0], value_col)
+                total_groups = len(summary)
+                if total_groups > max_groups:
+                    summary = summary.sort_values('count', ascending=False, kind='stable').iloc[:max_groups]
+                    title = f"{value_col} by {columns[0]} (top {max_groups} of {total_groups} groups)"
+                else:
+                    title = f"{value_col} by {columns[0]}"
+                names = [str(name) for name in summary.index]
+            
+            fig = go.Figure(go.Box(
+                x=names if len(columns) > 1 else None,
+                name=value_col if len(columns) == 1 else None,
+                q1=summary['q1'].to_numpy(),
+                median=summary['median'].to_numpy(),
+                q3=summary['q3'].to_numpy(),
+                lowerfence=summary['lowerfence'].to_numpy(),
+                upperfence=summary['upperfence'].to_numpy(),
+                mean=summary['mean'].to_numpy(),
+                boxpoints=False
+            ))
             
-            fig.update_layout(height=500)
+            fig.update_layout(
+                height=500,
+                title=title,
+                xaxis_title=columns[0] if len(columns) > 1 else None,
+                yaxis_title=value_col
+            )
             return fig
             
         except Exception as e:
             raise Exception(f"Error creating box plot: {str(e)}")
     
-    def create_correlation_matrix(self, df: pd.DataFrame) -> go.Figure:
-        """Create correlation matrix heatmap"""
+    @traced("viz.create_correlation_matrix")
+    def create_correlation_matrix(self, df: pd.DataFrame, columns: Optional[List[str]] = None) -> go.Figure:
+        """Create correlation matrix heatmap (of the given columns, or all numeric ones)"""
         try:
             # Select only numeric columns
-            numeric_df = df.select_dtypes(include=[np.number])
+            numeric_df = project_columns(df, columns) if columns else df.select_dtypes(include=[np.number])
             
             if numeric_df.empty:
                 raise Exception("No numeric columns found for correlation matrix")
@@ -215,6 +429,7 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating correlation matrix: {str(e)}")
     
+    @traced("viz.create_heatmap")
     def create_heatmap(self, df: pd.DataFrame, columns: List[str]) -> go.Figure:
         """Create general heatmap"""
         try:
@@ -240,6 +455,7 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating heatmap: {str(e)}")
     
+    @traced("viz.create_chart_from_suggestion")
     def create_chart_from_suggestion(self, df: pd.DataFrame, suggestion: Dict[str, Any]) -> go.Figure:
         """Create chart from AI suggestion"""
         try:
@@ -295,6 +511,7 @@ class VisualizationGenerator:
         except Exception as e:
             raise Exception(f"Error creating chart from suggestion: {str(e)}")
     
+    @traced("viz.create_summary_dashboard")
     def create_summary_dashboard(self, df: pd.DataFrame) -> List[go.Figure]:
         """Create a set of summary visualizations"""
         figures = []
@@ -323,5 +540,4 @@ class VisualizationGenerator:
             return figures
             
         except Exception as e:
-            st.error(f"Error creating summary dashboard: {str(e)}")
-            return []
+            raise Exception(f"Error creating summary dashboard: {str(e)}")
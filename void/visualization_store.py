@@ -0,0 +1,142 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Default location of the shared-visualization database (override with VOID_SHARE_DB)
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.void', 'shared_visualizations.db')
+
+# Shared links expire after this many seconds unless a TTL is given
+DEFAULT_SHARE_TTL = 30 * 24 * 3600
+
+# Decompressed figures kept in memory for repeated reads of popular links
+READ_CACHE_SIZE = 32
+
+# Expired links are purged at most this often (seconds), on write
+EVICTION_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS figures (
+    figure_hash TEXT PRIMARY KEY,
+    figure_zlib BLOB NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    viz_id TEXT PRIMARY KEY,
+    figure_hash TEXT NOT NULL REFERENCES figures(figure_hash),
+    session_id TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_expires_at ON links(expires_at);
+CREATE INDEX IF NOT EXISTS links_figure_hash ON links(figure_hash);
+"""
+
+
+class VisualizationStore:
+    """Persistent SQLite store of shared figures, deduplicated by content hash, with TTL expiry"""
+
+    def __init__(self, path: Optional[str] = None, default_ttl: int = DEFAULT_SHARE_TTL):
+        self.path = path or os.environ.get('VOID_SHARE_DB') or DEFAULT_STORE_PATH
+        self.default_ttl = default_ttl
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # sqlite3 connections are not shared across threads; Streamlit runs sessions in threads
+        self._local = threading.local()
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._last_eviction = 0.0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, figure_json: str, session_id: Optional[str] = None, ttl: Optional[int] = None) -> str:
+        """Store a figure's JSON and return a new link id; identical figures share one stored copy"""
+        raw = figure_json.encode('utf-8')
+        figure_hash = hashlib.sha256(raw).hexdigest()
+        viz_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._connect() as conn:
+            # Compress only when the content is new
+            exists = conn.execute('SELECT 1 FROM figures WHERE figure_hash = ?', (figure_hash,)).fetchone()
+            if not exists:
+                conn.execute(
+                    'INSERT OR IGNORE INTO figures (figure_hash, figure_zlib, raw_bytes, created_at) VALUES (?, ?, ?, ?)',
+                    (figure_hash, zlib.compress(raw, 6), len(raw), now)
+                )
+            conn.execute(
+                'INSERT INTO links (viz_id, figure_hash, session_id, created_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (viz_id, figure_hash, session_id, now, now + (self.default_ttl if ttl is None else ttl))
+            )
+
+        if now - self._last_eviction > EVICTION_INTERVAL:
+            self.evict_expired(now)
+        return viz_id
+
+    def get(self, viz_id: str) -> Optional[str]:
+        """Return the figure JSON of a link, or None if it does not exist or has expired"""
+        row = self._connect().execute(
+            'SELECT figure_hash, expires_at FROM links WHERE viz_id = ?', (viz_id,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        figure_hash = row[0]
+
+        with self._cache_lock:
+            if figure_hash in self._cache:
+                self._cache.move_to_end(figure_hash)
+                return self._cache[figure_hash]
+
+        blob = self._connect().execute(
+            'SELECT figure_zlib FROM figures WHERE figure_hash = ?', (figure_hash,)
+        ).fetchone()
+        if blob is None:
+            return None
+        figure_json = zlib.decompress(blob[0]).decode('utf-8')
+
+        with self._cache_lock:
+            self._cache[figure_hash] = figure_json
+            while len(self._cache) > READ_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return figure_json
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Delete expired links and figures no link refers to; return the number of links removed"""
+        now = now or time.time()
+        self._last_eviction = now
+        with self._connect() as conn:
+            removed = conn.execute('DELETE FROM links WHERE expires_at < ?', (now,)).rowcount
+            if removed:
+                orphans = [r[0] for r in conn.execute(
+                    'SELECT figure_hash FROM figures WHERE figure_hash NOT IN (SELECT figure_hash FROM links)'
+                )]
+                conn.executemany('DELETE FROM figures WHERE figure_hash = ?', [(h,) for h in orphans])
+                with self._cache_lock:
+                    for figure_hash in orphans:
+                        self._cache.pop(figure_hash, None)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Link and figure counts with raw vs stored sizes"""
+        conn = self._connect()
+        links = conn.execute('SELECT COUNT(*) FROM links').fetchone()[0]
+        figures, raw_bytes, stored_bytes = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(LENGTH(figure_zlib)), 0) FROM figures'
+        ).fetchone()
+        return {'links': links, 'figures': figures, 'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}